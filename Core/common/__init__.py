@@ -1,3 +1,4 @@
-from .misc import singleton, UUID, uuid, json_load, get_variable_name
+from .misc import singleton, UUID, uuid, json_load, get_variable_name, deep_copy
 from .relation_layer import RelationLayer
 from .tags_manager import TagsManager
+from .pipeline import Phase, Pipeline
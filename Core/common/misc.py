@@ -1,4 +1,6 @@
+import copy
 import json
+import types
 from typing import Any
 
 
@@ -48,3 +50,68 @@ def get_variable_name(variable):
         if value is variable:
             return name
     return None
+
+
+def _empty(cell: types.CellType) -> bool:
+    try:
+        cell.cell_contents
+    except ValueError:
+        return True
+    return False
+
+
+def _closures(root: Any) -> list[types.FunctionType]:
+    """root 可达的带闭包函数"""
+    seen: set[int] = set()
+    found: list[types.FunctionType] = []
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (str, bytes, int, float, type, types.ModuleType)):
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, types.FunctionType):
+            if obj.__closure__:
+                found.append(obj)
+                stack.extend(cell.cell_contents for cell in obj.__closure__ if not _empty(cell))
+            continue
+        if isinstance(obj, types.MethodType):
+            stack.append(obj.__self__)
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        stack.extend(getattr(obj, '__dict__', {}).values())
+        for slot in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+    return found
+
+
+def deep_copy(obj: Any, keep: tuple[Any, ...] = ()) -> Any:
+    """
+    深拷贝，闭包中捕获的对象一并拷贝
+
+    copy.deepcopy 将函数视为不可变对象，闭包仍指向原对象（如信号阶段捕获的 Signal）；
+    这里为每个带闭包函数建立新函数，其闭包单元在拷贝完成后按同一 memo 填入拷贝后的对象
+
+    :param keep: 不拷贝、拷贝结果中原样引用的对象（如单例）
+    """
+    memo: dict[int, Any] = {id(item): item for item in keep}
+    pending: list[tuple[types.FunctionType, tuple[types.CellType, ...]]] = []
+    for function in _closures(obj):
+        cells = tuple(types.CellType() for _ in function.__closure__)
+        copied = types.FunctionType(function.__code__, function.__globals__, function.__name__,
+                                    function.__defaults__, cells)
+        copied.__kwdefaults__ = function.__kwdefaults__
+        copied.__qualname__ = function.__qualname__
+        memo[id(function)] = copied
+        pending.append((function, cells))
+    res = copy.deepcopy(obj, memo)
+    for function, cells in pending:
+        for cell, copied in zip(function.__closure__, cells):
+            if not _empty(cell):
+                copied.cell_contents = copy.deepcopy(cell.cell_contents, memo)
+    return res
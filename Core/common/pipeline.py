@@ -0,0 +1,115 @@
+"""
+回合阶段流水线
+
+Pipeline 按顺序执行若干 Phase，每次 run 视为一回合：
+
+1. every 指定阶段执行间隔，每 every 回合执行一次，0 表示不执行
+
+2. idle 返回 True 时跳过该阶段，如信号无监听者
+
+3. 每个阶段累计执行次数、跳过次数与耗时
+"""
+from time import perf_counter_ns
+from typing import Callable, Optional
+
+
+class Phase:
+    def __init__(
+            self,
+            name: str,
+            run: Callable[[], None],
+            every: int = 1,
+            idle: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        if every < 0:
+            raise ValueError('invalid phase every')
+
+        self.name: str = name
+        self.run: Callable[[], None] = run
+        self.every: int = every
+        self.idle: Optional[Callable[[], bool]] = idle
+
+        self.calls: int = 0
+        self.skipped: int = 0
+        self.elapsed_ns: int = 0
+
+    def reset_timings(self) -> None:
+        self.calls = 0
+        self.skipped = 0
+        self.elapsed_ns = 0
+
+    def __repr__(self) -> str:
+        return f'Phase {self.name}'
+
+
+class Pipeline:
+    def __init__(self, name: str = '') -> None:
+        self.name: str = name
+        self.phases: list[Phase] = []
+        self.turn: int = 0
+
+    def _index(self, name: str) -> int:
+        for i, phase in enumerate(self.phases):
+            if phase.name == name:
+                return i
+        raise KeyError(f'unknown phase {name}')
+
+    def add(
+            self,
+            phase: Phase,
+            before: Optional[str] = None,
+            after: Optional[str] = None,
+    ) -> Phase:
+        """添加阶段，默认追加到末尾，可指定插入到某阶段前后"""
+        if any(p.name == phase.name for p in self.phases):
+            raise ValueError(f'phase {phase.name} already exists')
+        if before is not None and after is not None:
+            raise ValueError('before and after are exclusive')
+
+        if before is not None:
+            self.phases.insert(self._index(before), phase)
+        elif after is not None:
+            self.phases.insert(self._index(after) + 1, phase)
+        else:
+            self.phases.append(phase)
+        return phase
+
+    def remove(self, name: str) -> Phase:
+        return self.phases.pop(self._index(name))
+
+    def get(self, name: str) -> Phase:
+        return self.phases[self._index(name)]
+
+    def run(self) -> None:
+        self.turn += 1
+        for phase in self.phases:
+            if (
+                    phase.every == 0 or
+                    self.turn % phase.every or
+                    (phase.idle and phase.idle())
+            ):
+                phase.skipped += 1
+                continue
+
+            start = perf_counter_ns()
+            phase.run()
+            phase.elapsed_ns += perf_counter_ns() - start
+            phase.calls += 1
+
+    def export_timings(self) -> dict[str, dict[str, float]]:
+        return {
+            phase.name: {
+                'calls': phase.calls,
+                'skipped': phase.skipped,
+                'seconds': phase.elapsed_ns / 1e9,
+            }
+            for phase in self.phases
+        }
+
+    def reset_timings(self) -> None:
+        for phase in self.phases:
+            phase.reset_timings()
+
+    def clear(self) -> None:
+        """重置回合计数，保留阶段与计时"""
+        self.turn = 0
@@ -0,0 +1,93 @@
+"""
+编译配置缓存
+
+将解析并验证后的配置按源文件路径缓存，序列化为单个二进制文件，供多个工作进程一次读取共享
+
+每条缓存记录源文件 mtime 与内容哈希：
+
+1. mtime 未变，直接使用缓存
+
+2. mtime 变化但内容哈希一致，仅更新 mtime
+
+3. 内容变化，重新解析验证
+"""
+import hashlib
+import os
+import pickle
+from typing import Any, Callable, Optional
+
+ParseT = Callable[[bytes], Any]
+
+
+class ConfigCache:
+    VERSION: int = 1
+    """缓存格式或验证逻辑变化时递增，使旧缓存失效"""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        :param path: 缓存文件路径，为空则仅在内存中缓存
+        """
+        self.path: Optional[str] = path
+        self.entries: dict[str, tuple[int, str, Any]] = {}
+        """源文件路径 -> (mtime_ns, sha256, 数据)"""
+        self.dirty: bool = False
+
+        self.load()
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'rb') as f:
+                version, entries = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return
+
+        if version == self.VERSION:
+            self.entries = entries
+
+    def get(self, path: str, parse: ParseT) -> Any:
+        """获取源文件对应数据，必要时重新解析，调用方不应修改返回值"""
+        mtime = os.stat(path).st_mtime_ns
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[2]
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        data = entry[2] if entry is not None and entry[1] == digest else parse(raw)
+        self.entries[path] = (mtime, digest, data)
+        self.dirty = True
+        return data
+
+    def fresh(self, path: str) -> bool:
+        """源文件 mtime 与缓存一致"""
+        entry = self.entries.get(path)
+        return entry is not None and entry[0] == os.stat(path).st_mtime_ns
+
+    def put(self, path: str, mtime: int, digest: str, data: Any) -> None:
+        """写入外部（如工作进程）解析的结果"""
+        self.entries[path] = (mtime, digest, data)
+        self.dirty = True
+
+    def save(self) -> None:
+        """有更新时原子写回缓存文件"""
+        if not self.dirty or not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp = f'{self.path}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as f:
+            pickle.dump((self.VERSION, self.entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, self.path)
+        self.dirty = False
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.dirty = True
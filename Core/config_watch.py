@@ -0,0 +1,136 @@
+"""
+配置目录变化检测
+
+Linux 下优先使用 inotify（经 ctypes 调用 libc），不可用时退化为 mtime 轮询
+
+changed() 返回自上次调用以来新增、修改或删除的文件路径，路径格式为 目录 + 文件名，与 GameLoader 一致
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+from typing import Optional
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+_IN_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct('iIII')
+
+
+class _Inotify:
+    def __init__(self, directories: list[str]) -> None:
+        self.fd: int = -1
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError('libc not found')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify not available')
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self.directories: dict[int, str] = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                self.close()
+                raise OSError(errno, f'inotify_add_watch failed for {directory}')
+            self.directories[wd] = directory
+
+    def changed(self) -> Optional[set[str]]:
+        """返回 None 表示事件队列溢出，调用方应视为全部变化"""
+        res: set[str] = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return res
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = _EVENT.unpack_from(buffer, offset)
+                offset += _EVENT.size
+                name = buffer[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if wd in self.directories and name:
+                    res.add(self.directories[wd] + os.fsdecode(name))
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __del__(self, _close=os.close) -> None:
+        # 解释器退出时 os 模块可能已被清理，提前绑定 os.close
+        if self.fd >= 0:
+            _close(self.fd)
+            self.fd = -1
+
+
+class _Polling:
+    def __init__(self, directories: list[str]) -> None:
+        self.directories: list[str] = directories
+        self.mtimes: dict[str, int] = self._scan()
+
+    def _scan(self) -> dict[str, int]:
+        res: dict[str, int] = {}
+        for directory in self.directories:
+            for file in os.listdir(directory):
+                path = directory + file
+                try:
+                    res[path] = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+        return res
+
+    def changed(self) -> Optional[set[str]]:
+        mtimes = self._scan()
+        res = {
+            path
+            for path in mtimes.keys() | self.mtimes.keys()
+            if mtimes.get(path) != self.mtimes.get(path)
+        }
+        self.mtimes = mtimes
+        return res
+
+    def close(self) -> None:
+        pass
+
+
+class ConfigWatcher:
+    def __init__(self, directories: list[str], use_inotify: bool = True) -> None:
+        """
+        :param directories: 监视目录，以 / 结尾
+        :param use_inotify: 是否尝试 inotify，失败自动使用轮询
+        """
+        self.directories: list[str] = directories
+        self._backend: _Inotify | _Polling
+        try:
+            if not use_inotify:
+                raise OSError('inotify disabled')
+            self._backend = _Inotify(directories)
+        except OSError:
+            self._backend = _Polling(directories)
+
+    @property
+    def backend(self) -> str:
+        return 'inotify' if isinstance(self._backend, _Inotify) else 'polling'
+
+    def changed(self) -> Optional[set[str]]:
+        """自上次调用以来变化的文件，None 表示无法确定（应全部重读）"""
+        return self._backend.changed()
+
+    def close(self) -> None:
+        self._backend.close()
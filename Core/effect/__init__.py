@@ -1,2 +1,10 @@
-from . import effects
-from .effectsys import EffectSys
\ No newline at end of file
+from .effectsys import EffectSys
+
+# 内置效果按需导入，新增效果模块在此声明
+EffectSys().declare(f'{__name__}.effects', [
+    '直伤',
+    '回合属性修改',
+    '中毒',
+    '治疗',
+    '解除中毒补偿生命调整',
+])
@@ -25,16 +25,19 @@ class EffDirDamage(Effect):
         if len(self.caster) != 1:
             raise RuntimeError('invalid caster')
 
-        for target in self.targets:
-            if not gs.attributes.characters.alive.request(target):
-                continue
-
-            gs.take_damage_character(
-                value=self.value,
-                target=target,
-                source=self.caster[0],
-                damage_type='common',
-            )
+        values = [
+            (target, self.value)
+            for target in self.targets
+            if gs.attributes.characters.alive.request(target)
+        ]
+        if not values:
+            return
+
+        gs.take_damage_characters(
+            values=values,
+            source=self.caster[0],
+            damage_type='common',
+        )
 
 
 @es.register(
@@ -1,4 +1,9 @@
-from typing import Callable
+from importlib import import_module
+from importlib.metadata import entry_points
+from time import perf_counter
+from typing import Callable, TypeAlias
+
+from pydantic import BaseModel
 
 from ..common import singleton
 from ..entity import (
@@ -13,6 +18,14 @@ from ..gamesys import GameSys
 
 gs = GameSys()
 
+BindingT: TypeAlias = tuple[tuple[str, int], ...]
+"""效果角色字段与选择器下标的绑定"""
+PlanT: TypeAlias = list[tuple[Effect, BindingT]]
+"""容器执行计划，按顺序绑定并执行"""
+
+ENTRY_POINT_GROUP = 'r9turn.effects'
+"""插件包入口点组，入口点名为效果名，值为模块路径"""
+
 
 @singleton
 class EffectSys:
@@ -20,9 +33,17 @@ class EffectSys:
         self._names: set[str] = set()
         self._descriptions: dict[str, str] = {}
         self._effects: dict[str, type[Effect]] = {}
+        self._modules: dict[str, str] = {}
+        self._discovered: bool = False
+        self.imports: dict[str, float] = {}
+        """已导入的效果模块及导入耗时（秒），按导入顺序"""
+
+        self._schemas: dict[tuple[str, int], type[BaseModel]] = {}
+        self._fields: dict[str, tuple[str, ...]] = {}
 
         self.casters: dict[EntityID, EntityID] = {}
         self.containers: dict[EntityID, Container] = {}
+        self.plans: dict[EntityID, PlanT] = {}
 
     def register(
             self,
@@ -41,30 +62,101 @@ class EffectSys:
 
         return decorator
 
+    def declare(self, module: str, names: list[str]) -> None:
+        """声明效果所在模块，模块在容器首次引用其中效果时才导入"""
+        for name in names:
+            if name in self._modules and self._modules[name] != module:
+                raise RuntimeError(f"effect {name} already declared in {self._modules[name]}")
+            self._modules[name] = module
+
+    def discover(self) -> None:
+        """从已安装包的入口点声明效果，只执行一次"""
+        if self._discovered:
+            return
+        self._discovered = True
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            self.declare(ep.value, [ep.name])
+
+    def effect(self, name: str) -> type[Effect]:
+        """获取效果类，未导入则按声明导入其模块"""
+        if name in self._effects:
+            return self._effects[name]
+
+        if name not in self._modules:
+            self.discover()
+        if name not in self._modules:
+            raise RuntimeError(f"effect {name} not registered")
+
+        module = self._modules[name]
+        if module not in self.imports:
+            start = perf_counter()
+            import_module(module)
+            self.imports[module] = perf_counter() - start
+        if name not in self._effects:
+            raise RuntimeError(f"effect {name} not registered by {module}")
+        return self._effects[name]
+
+    def export_import_report(self) -> str:
+        lines = [f'[EffectSys] 已导入效果模块 {len(self.imports)} 个']
+        for module, seconds in self.imports.items():
+            names = [name for name, declared in self._modules.items() if declared == module]
+            lines.append(f'  {module}: {seconds * 1000:.2f} ms ({", ".join(names)})')
+        return '\n'.join(lines)
+
+    def config_schema(self, name: str, selector_range: int) -> type[BaseModel]:
+        """效果配置验证器，按效果名与选择器数缓存"""
+        key = (name, selector_range)
+        if key not in self._schemas:
+            self._schemas[key] = effect_export_config_schema(name, self.effect(name), selector_range)
+        return self._schemas[key]
+
+    def character_fields(self, name: str) -> tuple[str, ...]:
+        if name not in self._fields:
+            self._fields[name] = tuple(sorted(export_character_fields(self.effect(name))))
+        return self._fields[name]
+
     def load_container(
             self,
             caster: EntityID,
             belong: EntityID,
             container: Container,
     ):
+        """
+        加载容器并编译执行计划，配置验证与字段绑定只在此处进行一次
+        """
         # 注意，container 的 uuid 与存载实体(归属)一致
         effects: list[Effect] = []
+        plan: PlanT = []
 
         selectors_len: int = len(container.selectors)
         effect_name: list[NameT] = container.exoprt_effect_name()
 
         for name, effect_config in zip(effect_name, container.effect_config):
-            effect_schema = self._effects[name]
-            effect_config_schema = effect_export_config_schema(name, effect_schema, selectors_len)
-            effect_config_schema.model_validate(effect_config)
+            self.config_schema(name, selectors_len).model_validate(effect_config)
 
-            character_fields = export_character_fields(effect_schema)
+            character_fields = self.character_fields(name)
             effect_fields = effect_config | {character: None for character in character_fields}
-            effects.append(effect_schema(**effect_fields))
+            effect = self.effect(name)(**effect_fields)
+            effects.append(effect)
+            plan.append((effect, tuple((field, effect_config[field]) for field in character_fields)))
 
         container.effects = effects
         self.casters[belong] = caster
         self.containers[belong] = container
+        self.plans[belong] = plan
+
+    def attach(
+            self,
+            caster: EntityID,
+            belong: EntityID,
+            container: Container,
+            plan: PlanT,
+    ) -> None:
+        """重新挂载已由 load_container 编译的容器，跳过验证与效果实例化"""
+        container.effects = [effect for effect, _ in plan]
+        self.casters[belong] = caster
+        self.containers[belong] = container
+        self.plans[belong] = plan
 
     def export_container_need(self, belong: EntityID):
         if belong not in self.containers:
@@ -76,17 +168,18 @@ class EffectSys:
         )
 
     def run_container(self, belong: EntityID, selections: list[list[CharacterID]]):
-        if belong not in self.containers:
+        if belong not in self.plans:
             raise RuntimeError(f"Container {belong} not loaded")
 
-        container = self.containers[belong]
-        for effect, config in zip(container.effects, container.effect_config):
-            character_fields = export_character_fields(type(effect))
-            for field in character_fields:
-                index = config[field]
-                setattr(effect, field, selections[index])
+        plan = self.plans[belong]
+        # 字段已在加载时验证，直接写入实例字典，绕过 pydantic 的 __setattr__
+        for effect, binding in plan:
+            fields = effect.__dict__
+            for field, index in binding:
+                fields[field] = selections[index]
         # 无依赖，延迟执行保证不交叉
-        container.run()
+        for effect, _ in plan:
+            effect.run()
 
     def clear(self):
         for container in self.containers.values():
@@ -94,3 +187,4 @@ class EffectSys:
 
         self.casters.clear()
         self.containers.clear()
+        self.plans.clear()
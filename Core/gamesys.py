@@ -1,6 +1,6 @@
 from typing import TypeVar, Any, Callable, Optional, cast
 
-from .common import singleton, uuid, UUID
+from .common import singleton, uuid, UUID, Phase, Pipeline
 from .entity import (
     Game, Character, Player, GameID, CharacterID, PlayerID,
     export_flat_tags, SelectorT, CharacterTags, EntityID, Skill, SkillID,
@@ -11,6 +11,7 @@ from .managers import (
     Tags,
     Signals,
     Attributes,
+    Actions,
     signals,
 )
 from .signal import SignalBus, Signal, Slot
@@ -38,6 +39,17 @@ class GameSys:
         self.signal_bus: SignalBus = SignalBus()
         self.signals: Signals = Signals(self.signal_bus)
         self.attributes: Attributes = Attributes(self.signal_bus)
+        self.actions: Actions = Actions(self.relations, self.attributes)
+
+        self.turn_start_phases: Pipeline = Pipeline('turn_start')
+        self.turn_start_phases.add(self.signal_phase(self.signals.pre_turn_start))
+        self.turn_start_phases.add(self.signal_phase(self.signals.turn_start))
+
+        self.turn_end_phases: Pipeline = Pipeline('turn_end')
+        self.turn_end_phases.add(self.signal_phase(self.signals.pre_turn_end))
+        self.turn_end_phases.add(Phase('process', self.signal_bus.process))
+        self.turn_end_phases.add(self.signal_phase(self.signals.turn_end))
+        self.turn_end_phases.add(Phase('clean_up', self.clean_up))
 
     def ready(self):
         game_uuid: int = uuid()
@@ -57,34 +69,65 @@ class GameSys:
             arg = cast(signals.ArgDead, arg)
             self.tags.characters.update(arg.character, self.export_character_tags(arg.character))
 
+    def listened(self, signal: Signal[Any]) -> bool:
+        """信号发射是否可能有效果，否则可跳过参数构造与发射；打印信号参数时总是发射"""
+        return self.print_signal_args or self.signal_bus.has_listeners(signal)
+
+    def signal_phase(self, signal: Signal[None], every: int = 1) -> Phase:
+        """发射无参信号的阶段，信号无监听者时跳过"""
+        return Phase(
+            name=signal.name,
+            run=lambda: self.emit(signal, None),
+            every=every,
+            idle=lambda: not self.listened(signal),
+        )
+
     def export_character_tags(self, characterid: CharacterID) -> set[tuple[str, str]]:
         new_attrs = self.attributes.characters.export_current(characterid)
         return export_flat_tags(new_attrs)
 
-    def register_player(self, player: Player) -> None:
+    # 静态注册返回所用标签，同一实体重复注册时可传回以跳过标签导出
+    def register_player(self, player: Player, tags: Optional[set[tuple[str, str]]] = None) -> set[tuple[str, str]]:
         player.ready()
         playerid = PlayerID(player.uuid)
+        tags = export_flat_tags(player) if tags is None else tags
 
         self.relations.players.add(playerid, self.relations.game)
         self.attributes.players.register(player)
-        self.tags.players.add(playerid, export_flat_tags(player))
+        self.tags.players.add(playerid, tags)
+        return tags
 
-    def register_character(self, character: Character, player: Player) -> None:
+    def register_character(
+            self,
+            character: Character,
+            player: Player,
+            tags: Optional[set[tuple[str, str]]] = None,
+    ) -> set[tuple[str, str]]:
         character.ready()
         characterid = CharacterID(character.uuid)
+        tags = export_flat_tags(character) if tags is None else tags
 
         self.relations.characters.add(characterid, PlayerID(player.uuid))
         self.attributes.characters.register(character)
-        self.tags.characters.add(characterid, export_flat_tags(character))
+        self.tags.characters.add(characterid, tags)
+        return tags
 
-    def register_skill(self, skill: Skill, character: Character) -> None:
+    def register_skill(
+            self,
+            skill: Skill,
+            character: Character,
+            tags: Optional[set[tuple[str, str]]] = None,
+    ) -> set[tuple[str, str]]:
         """注册技能的非效果部分，效果部分由 EffectSys解决"""
         skill.ready()
         skillid = SkillID(skill.uuid)
+        tags = export_flat_tags(skill) if tags is None else tags
 
         self.relations.skills.add(skillid, CharacterID(character.uuid))
         self.attributes.skills.register(skill)
-        self.tags.skills.add(skillid, export_flat_tags(skill))
+        self.tags.skills.add(skillid, tags)
+        self.actions.register_skill(skillid, CharacterID(character.uuid))
+        return tags
 
     # 以上几个 register 是静态注册的，归属不使用 id，下者动态注册，用 id 对象
     def register_status(self, status: Status, character: CharacterID) -> StatusID:
@@ -111,12 +154,13 @@ class GameSys:
         attr = self.attributes.characters
 
         # ---------- 伤害计算收集 ----------
-        arg_damage_collect = signals.ArgDamageCollect(
-            target=target,
-            source=source,
-            damage_type=damage_type,
-        )
-        self.emit(self.signals.damage_collect, arg_damage_collect)
+        if self.listened(self.signals.damage_collect):
+            arg_damage_collect = signals.ArgDamageCollect(
+                target=target,
+                source=source,
+                damage_type=damage_type,
+            )
+            self.emit(self.signals.damage_collect, arg_damage_collect)
         attack = attr.attack.request(source)
         defense = attr.defense.request(target)
         damage = max(attack + value - defense, 0)
@@ -134,23 +178,25 @@ class GameSys:
         attr = self.attributes.characters
         # ---------- 预伤害处理 ----------
         damage = max(damage, 0)
-        arg_pre_damage = signals.ArgPreDamage(
-            damage=damage,
-            target=target,
-            source=source,
-            damage_type=damage_type,
-        )
-        self.emit(self.signals.pre_damage, arg_pre_damage)
-        damage = max(arg_pre_damage.damage, 0)
+        if self.listened(self.signals.pre_damage):
+            arg_pre_damage = signals.ArgPreDamage(
+                damage=damage,
+                target=target,
+                source=source,
+                damage_type=damage_type,
+            )
+            self.emit(self.signals.pre_damage, arg_pre_damage)
+            damage = max(arg_pre_damage.damage, 0)
         # ---------- 实际伤害 ----------
         true_damage = -attr.modify_hp(delta=-damage, character=target)
-        arg_damage = signals.ArgDamage(
-            true_damage=true_damage,
-            target=target,
-            source=source,
-            damage_type=damage_type,
-        )
-        self.emit(self.signals.damage, arg_damage)
+        if self.listened(self.signals.damage):
+            arg_damage = signals.ArgDamage(
+                true_damage=true_damage,
+                target=target,
+                source=source,
+                damage_type=damage_type,
+            )
+            self.emit(self.signals.damage, arg_damage)
 
         alive = self.attributes.characters.alive.request(target)
         if not alive:
@@ -164,6 +210,111 @@ class GameSys:
 
         return true_damage
 
+    def take_damage_characters(
+            self,
+            values: list[tuple[CharacterID, int]],
+            source: CharacterID,
+            damage_type: signals.DamageType,
+    ) -> list[int]:
+        """
+        批量造成伤害，按阶段执行：收集、预伤害、实际伤害、死亡，生命修改一轮完成
+
+        每个阶段先按目标顺序发射单目标信号（damage_collect、pre_damage、damage），再发射一次批量信号，
+        批量信号的参数可逐目标调整；单目标与批量监听者同时存在时两者都会收到。
+        与 take_damage_character 相同，攻击力在收集阶段之后读取一次；只有一个目标时事件顺序与之相同
+
+        :return 与 values 一一对应的实际伤害
+        """
+        attr = self.attributes.characters
+        targets = [target for target, _ in values]
+
+        # ---------- 伤害计算收集 ----------
+        if self.listened(self.signals.damage_collect):
+            for target in targets:
+                self.emit(
+                    self.signals.damage_collect,
+                    signals.ArgDamageCollect(
+                        target=target,
+                        source=source,
+                        damage_type=damage_type,
+                    )
+                )
+        if self.listened(self.signals.batch_damage_collect):
+            self.emit(
+                self.signals.batch_damage_collect,
+                signals.ArgBatchDamageCollect(
+                    targets=targets,
+                    source=source,
+                    damage_type=damage_type,
+                )
+            )
+        attack = attr.attack.request(source)
+        damages = [
+            max(attack + value - attr.defense.request(target), 0)
+            for target, value in values
+        ]
+
+        # ---------- 预伤害处理 ----------
+        if self.listened(self.signals.pre_damage):
+            for i, target in enumerate(targets):
+                arg_pre_damage = signals.ArgPreDamage(
+                    damage=damages[i],
+                    target=target,
+                    source=source,
+                    damage_type=damage_type,
+                )
+                self.emit(self.signals.pre_damage, arg_pre_damage)
+                damages[i] = max(arg_pre_damage.damage, 0)
+        if self.listened(self.signals.batch_pre_damage):
+            arg_batch_pre_damage = signals.ArgBatchPreDamage(
+                damages=damages,
+                targets=targets,
+                source=source,
+                damage_type=damage_type,
+            )
+            self.emit(self.signals.batch_pre_damage, arg_batch_pre_damage)
+            damages = [max(damage, 0) for damage in arg_batch_pre_damage.damages]
+
+        # ---------- 实际伤害 ----------
+        true_damages = [
+            -delta
+            for delta in attr.modify_hps([(target, -damage) for target, damage in zip(targets, damages)])
+        ]
+        if self.listened(self.signals.damage):
+            for target, true_damage in zip(targets, true_damages):
+                self.emit(
+                    self.signals.damage,
+                    signals.ArgDamage(
+                        true_damage=true_damage,
+                        target=target,
+                        source=source,
+                        damage_type=damage_type,
+                    )
+                )
+        if self.listened(self.signals.batch_damage):
+            self.emit(
+                self.signals.batch_damage,
+                signals.ArgBatchDamage(
+                    true_damages=true_damages,
+                    targets=targets,
+                    source=source,
+                    damage_type=damage_type,
+                )
+            )
+
+        # 同一目标重复出现时只发射一次死亡信号
+        for target in dict.fromkeys(targets):
+            if not attr.alive.request(target):
+                self.emit(
+                    self.signals.dead,
+                    signals.ArgDead(
+                        character=target,
+                        source=source,
+                    )
+                )
+
+        return true_damages
+
     def character_selector(self, caster: EntityID, preset: SelectorT) -> tuple[int, set[CharacterID]]:
         select = self.tags.characters.select
         attrs = self.attributes.characters
@@ -216,22 +367,24 @@ class GameSys:
     ) -> bool:
         """返回是否正式生效"""
         # ---------- 告知状态 ----------
-        arg_could_add_status = signals.ArgCouldAddStatus(
-            effective=True,
-            source=source,
-            target=target,
-            status=status,
-        )
-        self.emit(self.signals.could_add_status, arg_could_add_status)
+        if self.listened(self.signals.could_add_status):
+            arg_could_add_status = signals.ArgCouldAddStatus(
+                effective=True,
+                source=source,
+                target=target,
+                status=status,
+            )
+            self.emit(self.signals.could_add_status, arg_could_add_status)
+            if not arg_could_add_status.effective:
+                return False
         # ---------- 生效 ----------
-        if not arg_could_add_status.effective:
-            return False
-        arg_pre_add_status = signals.ArgPreAddStatus(
-            source=source,
-            target=target,
-            status=status,
-        )
-        self.emit(self.signals.pre_add_status, arg_pre_add_status)
+        if self.listened(self.signals.pre_add_status):
+            arg_pre_add_status = signals.ArgPreAddStatus(
+                source=source,
+                target=target,
+                status=status,
+            )
+            self.emit(self.signals.pre_add_status, arg_pre_add_status)
         return True
 
     def health(
@@ -240,13 +393,15 @@ class GameSys:
             target: CharacterID,
             value: int
     ) -> int:
-        arg = signals.ArgHealth(
-            source=source,
-            target=target,
-            value=value,
-        )
-        self.emit(self.signals.health, arg)
-        return self.attributes.characters.modify_hp(arg.value, target)
+        if self.listened(self.signals.health):
+            arg = signals.ArgHealth(
+                source=source,
+                target=target,
+                value=value,
+            )
+            self.emit(self.signals.health, arg)
+            value = arg.value
+        return self.attributes.characters.modify_hp(value, target)
 
     def add_status(
             self,
@@ -296,12 +451,13 @@ class GameSys:
         if ready:
             ready()
 
-        arg_add_status = signals.ArgAddStatus(
-            source=source,
-            target=target,
-            status=statusid,
-        )
-        self.emit(self.signals.add_status, arg_add_status)
+        if self.listened(self.signals.add_status):
+            arg_add_status = signals.ArgAddStatus(
+                source=source,
+                target=target,
+                status=statusid,
+            )
+            self.emit(self.signals.add_status, arg_add_status)
 
         return True
 
@@ -310,19 +466,21 @@ class GameSys:
             status: StatusID,
             source: EntityID,
     ):
-        arg_pre_remove_status = signals.ArgPreRemoveStatus(
-            effective=True,
-            source=source,
-            status=status,
-        )
-        self.emit(self.signals.pre_remove_status, arg_pre_remove_status)
-        if not arg_pre_remove_status.effective:
-            return False
-        arg_remove_status = signals.ArgRemoveStatus(
-            source=source,
-            status=status,
-        )
-        self.emit(self.signals.remove_status, arg_remove_status)
+        if self.listened(self.signals.pre_remove_status):
+            arg_pre_remove_status = signals.ArgPreRemoveStatus(
+                effective=True,
+                source=source,
+                status=status,
+            )
+            self.emit(self.signals.pre_remove_status, arg_pre_remove_status)
+            if not arg_pre_remove_status.effective:
+                return False
+        if self.listened(self.signals.remove_status):
+            arg_remove_status = signals.ArgRemoveStatus(
+                source=source,
+                status=status,
+            )
+            self.emit(self.signals.remove_status, arg_remove_status)
         self.delete_status(status)
         return True
 
@@ -340,8 +498,14 @@ class GameSys:
 
         return True
 
+    def get_usable_skills(self, player: PlayerID) -> list[SkillID]:
+        """玩家当前可用技能，由 Actions 增量维护，仅在存在修改槽时发起响应式请求"""
+        self.actions.refresh()
+        return self.actions.usable(player)
+
     def get_allowed_skills(self):
-        """单独拉取技能是否允许使用"""
+        """单独拉取技能是否允许使用，Actions 索引的嵌套字典视图"""
+        self.actions.refresh()
         res: dict[int, dict[int, dict[int, bool]]] = {}
         players = self.relations.players.get_all_items()
         for player in players:
@@ -352,17 +516,22 @@ class GameSys:
                 rp[character.uuid] = {}
                 rc = rp[character.uuid]
                 for skill in self.relations.skills.get_children(character):
-                    rc[skill.uuid] = self.skill_usable(skill)
+                    rc[skill.uuid] = self.actions.is_usable(skill)
         return res
 
     def turn_start(self):
-        self.emit(self.signals.pre_turn_start, None)
-        self.emit(self.signals.turn_start, None)
+        """回合开始流水线，默认为 pre_turn_start、turn_start"""
+        self.turn_start_phases.run()
 
     def process(self):
-        self.emit(self.signals.pre_turn_end, None)
-        self.signal_bus.process()
-        self.emit(self.signals.turn_end, None)
+        """回合结束流水线，默认为 pre_turn_end、process、turn_end、clean_up"""
+        self.turn_end_phases.run()
+
+    def export_phase_timings(self) -> dict[str, dict[str, dict[str, float]]]:
+        return {
+            pipeline.name: pipeline.export_timings()
+            for pipeline in (self.turn_start_phases, self.turn_end_phases)
+        }
 
     def clean_up(self):
         self.relations.clean_up()
@@ -373,6 +542,9 @@ class GameSys:
         self.relations.clear()
         self.tags.clear()
         self.signal_bus.clear()
+        self.actions.clear()
+        self.turn_start_phases.clear()
+        self.turn_end_phases.clear()
         temp = UUID()
         temp.uuid = 0
 
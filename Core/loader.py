@@ -1,9 +1,56 @@
+import copy
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from tomllib import loads as toml_loads
+from typing import Any, Callable, Optional
+
+from .config_cache import ConfigCache
+from .config_watch import ConfigWatcher
 from .entity import Player, Character, Skill, CharacterID, SkillID
 from .gamesys import GameSys
-from .common import uuid
+from .common import uuid, UUID
 from .effect import EffectSys
 
+SKILL_FILE = re.compile(r'^(?P<character>.+)_(?P<slot>\d+)\.toml$')
+"""技能配置文件名，角色名_槽位.toml"""
+
+
+def validate_character(data: dict[str, Any]) -> None:
+    Character(**data)
+
+
+def validate_skill(data: dict[str, Any], slot: int) -> None:
+    """验证技能及其各效果配置（经 EffectSys 注册表）"""
+    skill = Skill(**data, slot=slot)
+    selectors_len = len(skill.container.selectors)
+    for effect_config in skill.container.effect_config:
+        EffectSys().config_schema(str(effect_config['name']), selectors_len).model_validate(effect_config)
+
+
+def load_config(path: str, slot: Optional[int]) -> tuple[str, int, str, Any, Optional[str]]:
+    """
+    读取、解析并验证单个配置文件，供预加载工作进程使用
+
+    :param slot: 技能槽位，None 表示角色配置
+    :return: 路径、mtime、内容哈希、数据、错误信息
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = toml_loads(raw.decode('utf-8'))
+        if slot is None:
+            validate_character(data)
+        else:
+            validate_skill(data, slot)
+    except Exception as e:
+        return path, 0, '', None, f'{type(e).__name__}: {e}'
+
+    return path, mtime, hashlib.sha256(raw).hexdigest(), data, None
+
 
 class GameLoader:
     def __init__(
@@ -14,7 +61,12 @@ class GameLoader:
             es: EffectSys,
             character_config_path: str,
             skill_config_path: str,
+            cache_path: str = '',
+            preload_configs: bool = False,
+            preload_workers: int = 0,
     ):
+        self.watcher: Optional[ConfigWatcher] = None
+        """file_reload 时在首次 ready 中创建，关闭 file_reload 即释放"""
         self.file_reload = file_reload
         self.players = players
         self.gs = gs
@@ -22,19 +74,152 @@ class GameLoader:
         self.character_config_path = character_config_path
         self.skill_config_path = skill_config_path
 
+        self.cache_path = cache_path
+        self.cache: ConfigCache = ConfigCache(cache_path or None)
         self.loaded: dict[str, dict] = {}
+        self.preload_configs = preload_configs
+        self.preload_workers = preload_workers
+        self.preloaded: bool = False
+        self.replay: list[Callable[[], Any]] = []
+        """上次 ready 的注册步骤，reset 时按序重放"""
+        self.replay_uuid: int = 0
+        """上次 ready 结束时的 uuid 计数"""
+        self.blueprints: dict[tuple, tuple[list[Callable[[], Any]], int]] = {}
+        """(座次, 起始 uuid, 玩家名, 角色, 配置覆盖) -> (该队伍的注册步骤, 结束时的 uuid 计数)，按最近使用排列"""
+        self.blueprint_cache: int = 1024
+        self.overrides: dict[str, dict[str, Any]] = {}
+        """配置文件名（不含扩展名） -> {点分键路径: 值}，读取配置后覆盖，不写入文件"""
+
+    @property
+    def file_reload(self) -> bool:
+        return self._file_reload
+
+    @file_reload.setter
+    def file_reload(self, value: bool) -> None:
+        self._file_reload = value
+        if not value and self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
 
-    def read_file(self, path: str):
-        if path not in self.loaded or self.file_reload:
-            with open(path, 'r', encoding='utf-8') as f:
-                self.loaded[path] = toml_loads(f.read())
+    def configure(
+            self,
+            file_reload: bool,
+            players: list[dict[str, str | list[str]]],
+            character_config_path: str,
+            skill_config_path: str,
+            cache_path: str = '',
+            preload_configs: bool = False,
+            preload_workers: int = 0,
+    ) -> None:
+        """
+        按重新读取的进程配置更新，参数同构造函数
+
+        配置目录不变时保留已解析的配置、监视器及其变化记录；目录变化则全部重新读取
+        """
+        if (character_config_path, skill_config_path) != (self.character_config_path, self.skill_config_path):
+            self.file_reload = False
+            self.character_config_path = character_config_path
+            self.skill_config_path = skill_config_path
+            self.loaded.clear()
+            self.blueprints.clear()
+            self.preloaded = False
+        if cache_path != self.cache_path:
+            self.cache_path = cache_path
+            self.cache = ConfigCache(cache_path or None)
+        self.file_reload = file_reload
+        self.players = players
+        self.preload_configs = preload_configs
+        self.preload_workers = preload_workers
+
+    def read_file(self, path: str, validate: Optional[Callable[[dict[str, Any]], None]] = None):
+        """
+        读取配置，解析与验证结果由 ConfigCache 缓存，源文件未变化时不再解析
+
+        file_reload 时由 ConfigWatcher 在 ready 中失效变化的文件，未变化的文件直接来自内存
+        """
+        if path not in self.loaded:
+            def _parse(raw: bytes) -> dict[str, Any]:
+                data = toml_loads(raw.decode('utf-8'))
+                if validate:
+                    validate(data)
+                return data
+
+            self.loaded[path] = self.cache.get(path, _parse)
 
         return self.loaded[path]
 
+    def discover(self) -> list[tuple[str, Optional[int]]]:
+        """配置目录下全部角色与技能配置文件，技能附带槽位"""
+        res: list[tuple[str, Optional[int]]] = []
+        for file in sorted(os.listdir(self.character_config_path)):
+            if file.endswith('.toml'):
+                res.append((f'{self.character_config_path}{file}', None))
+        for file in sorted(os.listdir(self.skill_config_path)):
+            match = SKILL_FILE.match(file)
+            if match:
+                res.append((f'{self.skill_config_path}{file}', int(match['slot'])))
+        return res
+
+    def preload(self, workers: int = 0) -> None:
+        """
+        并行解析验证全部配置，一次报告所有错误，之后的读取均来自内存
+
+        缓存仍新鲜的文件不再解析
+
+        :param workers: 工作进程数，0 表示 CPU 数，1 表示在本进程中执行
+        """
+        stale = [(path, slot) for path, slot in self.discover() if not self.cache.fresh(path)]
+
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, len(stale))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(load_config, *zip(*stale), chunksize=max(len(stale) // (workers * 4), 1)))
+        else:
+            results = [load_config(path, slot) for path, slot in stale]
+
+        errors = [f'  {path}: {error}' for path, _, _, _, error in results if error]
+        if errors:
+            raise RuntimeError(f'{len(errors)} invalid config file(s):\n' + '\n'.join(errors))
+
+        for path, mtime, digest, data, _ in results:
+            self.cache.put(path, mtime, digest, data)
+        for path, _ in self.discover():
+            self.loaded[path] = self.cache.entries[path][2]
+        self.cache.save()
+        self.preloaded = True
+
+    def apply_overrides(self, stem: str, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        按 overrides 覆盖配置，返回副本，缓存中的解析结果不变
+
+        键路径以点分隔，列表以下标访问，如 container.effect_config.0.value；只能覆盖已有的键
+        """
+        values = self.overrides.get(stem)
+        if not values:
+            return data
+
+        data = copy.deepcopy(data)
+        for key_path, value in values.items():
+            *parents, last = key_path.split('.')
+            node = data
+            try:
+                for key in parents:
+                    node = node[int(key)] if isinstance(node, list) else node[key]
+                if isinstance(node, list):
+                    node[int(last)] = value
+                elif last in node:
+                    node[last] = value
+                else:
+                    raise KeyError(last)
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise KeyError(f'{stem}:{key_path}') from None
+        return data
+
     def read_character(self, character_name: str):
         path = f'{self.character_config_path}{character_name}.toml'
 
-        return self.read_file(path)
+        return self.apply_overrides(character_name, self.read_file(path, validate_character))
 
     def read_skill(
             self,
@@ -43,7 +228,8 @@ class GameLoader:
     ):
         path = f'{self.skill_config_path}{character_name}_{skill_slot}.toml'
 
-        return self.read_file(path)
+        data = self.read_file(path, partial(validate_skill, slot=skill_slot))
+        return self.apply_overrides(f'{character_name}_{skill_slot}', data)
 
     def register_player(self, index: int):
         player_uuid = uuid()
@@ -54,7 +240,8 @@ class GameLoader:
             name=name,
             display_name=name,
         )
-        self.gs.register_player(player)
+        tags = self.gs.register_player(player)
+        self.replay.append(partial(self.gs.register_player, player, tags))
         for character_name in self.players[index]['characters']:
             self.register_character(character_name, player)
 
@@ -65,7 +252,8 @@ class GameLoader:
             uuid=character_uuid,
             camp=player.camp,
         )
-        self.gs.register_character(character, player)
+        tags = self.gs.register_character(character, player)
+        self.replay.append(partial(self.gs.register_character, character, player, tags))
         for i in range(1, 3):
             self.register_skill(i, character)
 
@@ -77,18 +265,122 @@ class GameLoader:
             camp=character.camp,
             slot=slot
         )
-        self.gs.register_skill(skill, character)
+        tags = self.gs.register_skill(skill, character)
         skill.container.uuid = skill_uuid
+        caster = CharacterID(character.uuid)
+        belong = SkillID(skill.uuid)
         self.es.load_container(
-            caster=CharacterID(character.uuid),
-            belong=SkillID(skill.uuid),
+            caster=caster,
+            belong=belong,
             container=skill.container,
         )
+        self.replay.append(partial(self.gs.register_skill, skill, character, tags))
+        self.replay.append(partial(self.es.attach, caster, belong, skill.container, self.es.plans[belong]))
+
+    def reload_changed(self) -> set[str]:
+        """
+        失效自上次检查以来变化的配置，下次读取时重新解析验证
+
+        监视器尚未创建时（首次检查或重新开启 file_reload）无变化记录，视为已读取的配置全部变化
+        """
+        if not self.file_reload:
+            return set()
+
+        if self.watcher is None:
+            self.watcher = ConfigWatcher([self.character_config_path, self.skill_config_path])
+            changed = None
+        else:
+            changed = self.watcher.changed()
+        if changed is None:
+            changed = set(self.loaded)
+        for path in changed:
+            self.loaded.pop(path, None)
+        return changed
 
     def ready(self):
+        if self.reload_changed():
+            # 缓存的队伍注册步骤持有旧配置构造的实体
+            self.blueprints.clear()
+        if self.preload_configs and not self.preloaded:
+            self.preload(self.preload_workers)
+        self.compose(reuse=False)
+        self.cache.save()
+
+    def compose(self, reuse: bool = True) -> None:
+        """
+        注册双方并记录注册步骤供 reset 重放
+
+        uuid 从固定起点分配，同一队伍在同一座次、同一起始 uuid 下的注册步骤（含已编译的容器）相同，
+        按队伍缓存，对阵由双方的缓存组合而成；reuse 为 False 时重新构建并替换缓存。
+        游戏系统中已有的对局（可能来自同一进程中的其他加载器）先被清空
+        """
+        self.clear()
+        UUID().uuid = 0
         self.gs.ready()
-        for i in range(2):
-            self.register_player(i)
+        overrides = tuple(sorted((stem, tuple(sorted(values.items()))) for stem, values in self.overrides.items()))
+        steps: list[Callable[[], Any]] = []
+        for index in range(2):
+            player = self.players[index]
+            key = (index, UUID().uuid, player['name'], tuple(player['characters']), overrides)
+            blueprint = self.blueprints.pop(key, None) if reuse else None
+            if blueprint is None:
+                self.replay = []
+                self.register_player(index)
+                blueprint = (self.replay, UUID().uuid)
+            else:
+                for step in blueprint[0]:
+                    step()
+                UUID().uuid = blueprint[1]
+            self.blueprints[key] = blueprint
+            steps += blueprint[0]
+        while len(self.blueprints) > self.blueprint_cache:
+            self.blueprints.pop(next(iter(self.blueprints)))
+
+        self.replay = steps
+        self.replay_uuid = UUID().uuid
+
+    def reset(self):
+        """
+        原地重置对局，重放上次 ready 的注册步骤
+
+        复用已构造的实体与已编译的容器，不读取配置、不访问文件系统；尚未 ready 过则退化为 ready
+        """
+        self.clear()
+        if not self.replay:
+            self.ready()
+            return
+
+        self.gs.ready()
+        for step in self.replay:
+            step()
+        UUID().uuid = self.replay_uuid
+
+    def use_players(self, players: list[dict[str, str | list[str]]]) -> None:
+        """
+        切换对阵，下次 reset 时生效
+
+        已解析的配置直接复用；各队伍的注册步骤（含已编译的容器）按 (队伍, 座次, 配置覆盖) 最近使用缓存，
+        对阵由双方队伍组合，队伍很多时缓存条目只随队伍数增长
+        """
+        previous = self.players
+        self.players = players
+        try:
+            self.compose()
+        except Exception:
+            self.players = previous
+            self.compose()
+            raise
+
+    def use_overrides(self, overrides: dict[str, dict[str, Any]]) -> None:
+        """切换内存中的配置覆盖（见 overrides），下次 reset 时生效；覆盖无效时保持原覆盖并抛出"""
+        previous = self.overrides
+        self.overrides = {stem: dict(values) for stem, values in overrides.items() if values}
+        try:
+            self.compose()
+        except Exception:
+            self.overrides = previous
+            self.compose()
+            raise
 
     def clear(self):
         self.gs.clear()
@@ -1,3 +1,4 @@
+from .actions import Actions
 from .attributes import Attributes
 from .relations import Relations
 from .signals import Signals
@@ -0,0 +1,113 @@
+from .attributes import Attributes
+from .relations import Relations
+from ..entity import EntityID, PlayerID, CharacterID, SkillID
+
+
+class Actions:
+    """
+    合法行动索引，按玩家维护可用技能位掩码
+
+    仅在角色 in_play、alive 或技能 usable 的持久化值变化时增量更新，读取不发起响应式请求；
+    这三个属性上连接了修改槽（一次性或条件修改）时，读取前调用 refresh 使修改反映到索引
+    """
+
+    def __init__(self, relations: Relations, attributes: Attributes) -> None:
+        self.relations: Relations = relations
+        self.attributes: Attributes = attributes
+
+        self.skills: dict[PlayerID, list[SkillID]] = {}
+        """玩家技能，下标即位掩码中的位"""
+        self.bits: dict[SkillID, tuple[PlayerID, int]] = {}
+        self.masks: dict[PlayerID, int] = {}
+        self._usable: dict[PlayerID, list[SkillID]] = {}
+        """可用技能列表缓存，掩码变化时失效"""
+
+        characters = self.attributes.characters
+        characters.in_play.watch(self._on_character)
+        characters.alive.watch(self._on_character)
+        self.attributes.skills.usable.watch(self._on_skill)
+
+    def register_skill(self, skill: SkillID, character: CharacterID) -> None:
+        player = self.relations.characters.get_parent(character)
+        if player is None:
+            raise RuntimeError(f'character {character} not registered')
+
+        skills = self.skills.setdefault(player, [])
+        self.bits[skill] = (player, len(skills))
+        skills.append(skill)
+        self.masks.setdefault(player, 0)
+
+        self._update(skill)
+
+    def _update(self, skill: EntityID) -> None:
+        player, bit = self.bits[skill]
+        character = self.relations.skills.get_parent(skill)
+        characters = self.attributes.characters
+        usable = (
+                characters.in_play.current(character) and
+                characters.alive.current(character) and
+                self.attributes.skills.usable.current(skill)
+        )
+
+        mask = self.masks[player]
+        new_mask = mask | (1 << bit) if usable else mask & ~(1 << bit)
+        if new_mask != mask:
+            self.masks[player] = new_mask
+            self._usable.pop(player, None)
+
+    def _on_character(self, character: EntityID, _: bool) -> None:
+        for skill in self.relations.skills.get_children(character):
+            if skill in self.bits:
+                self._update(skill)
+
+    def _on_skill(self, skill: EntityID, _: bool) -> None:
+        if skill in self.bits:
+            self._update(skill)
+
+    def listened(self) -> bool:
+        """in_play、alive、usable 上是否连接了修改槽，否则 request 不会改变存储值，索引即为最新"""
+        characters = self.attributes.characters
+        return any(
+            rx.signal_bus.has_listeners(rx.signal)
+            for rx in (characters.in_play, characters.alive, self.attributes.skills.usable)
+        )
+
+    def refresh(self) -> None:
+        """
+        存在修改槽时按技能注册顺序逐一 request（同 GameSys.skill_usable 的顺序与短路），
+        变化经 watch 回调更新索引；没有修改槽时不做任何事
+        """
+        if not self.listened():
+            return
+
+        characters = self.attributes.characters
+        usable = self.attributes.skills.usable
+        for skill in self.bits:
+            character = self.relations.skills.get_parent(skill)
+            if characters.in_play.request(character) and characters.alive.request(character):
+                usable.request(skill)
+
+    def mask(self, player: PlayerID) -> int:
+        """可用技能位掩码，第 i 位对应 skills[player][i]"""
+        return self.masks.get(player, 0)
+
+    def usable(self, player: PlayerID) -> list[SkillID]:
+        """可用技能列表，按注册顺序，结果被缓存，调用方不应修改"""
+        if player not in self._usable:
+            mask = self.masks.get(player, 0)
+            self._usable[player] = [
+                skill
+                for i, skill in enumerate(self.skills.get(player, []))
+                if mask >> i & 1
+            ]
+        return self._usable[player]
+
+    def is_usable(self, skill: SkillID) -> bool:
+        player, bit = self.bits[skill]
+        return bool(self.masks[player] >> bit & 1)
+
+    def clear(self) -> None:
+        self.skills.clear()
+        self.bits.clear()
+        self.masks.clear()
+        self._usable.clear()
@@ -2,7 +2,7 @@ from typing import Callable
 
 from ..entity import Character, CharacterID
 from ..rxsys import RxPers, RxTemp, ArgRx, entity_equal
-from ..signal import SignalBus, Slot
+from ..signal import SignalBus
 
 
 class AttrCharacter:
@@ -76,17 +76,7 @@ class AttrCharacter:
             }
         )
 
-    def modify_hp(self, delta: int, character: CharacterID) -> int:
-        """
-        在外部计算好生命修改后，内部直接修改生命
-
-        对修改值合理性检查
-
-        修改结束判断是否存活，注意这里不会发出 dead 信号
-
-        :return 实际造成伤害
-        """
-
+    def _hp_modifier(self, delta: int) -> Callable[[ArgRx[int]], None]:
         def _modifier(arg: ArgRx[int]) -> None:
             # 直接读取 alive/max_hp 避免无限循环
             alive = self.alive.current(arg.target)
@@ -98,14 +88,36 @@ class AttrCharacter:
                 new_hp = max(new_hp, 0)
                 arg.append(new_hp)
 
-        slot = Slot[ArgRx[int]](
-            check=entity_equal(character),
-            callback=_modifier,
-            times=1,
-        )
+        return _modifier
 
+    def modify_hp(self, delta: int, character: CharacterID) -> int:
+        """
+        在外部计算好生命修改后，内部直接修改生命
+
+        对修改值合理性检查，修改在既有生命修改之后执行，不会遗留槽
+
+        修改结束判断是否存活，注意这里不会发出 dead 信号
+
+        :return 实际造成伤害
+        """
         old_hp = self.hp.current(character)
-        self.hp.add_slot(slot=slot)
-        self.hp.request(character)
+        new_hp = self.hp.mutate(character, self._hp_modifier(delta))
         self.alive.request(character)
-        return self.hp.current(character) - old_hp
+        return new_hp - old_hp
+
+    def modify_hps(self, deltas: list[tuple[CharacterID, int]]) -> list[int]:
+        """
+        批量版本 modify_hp，按顺序逐条修改生命，再统一判断存活
+
+        同一目标重复出现时逐条修改、逐条截断，结果与依次调用 modify_hp 相同
+
+        :return 与 deltas 一一对应的实际生命变化
+        """
+        changed: list[int] = []
+        for character, delta in deltas:
+            old_hp = self.hp.current(character)
+            changed.append(self.hp.mutate(character, self._hp_modifier(delta)) - old_hp)
+        for character in dict.fromkeys(character for character, _ in deltas):
+            self.alive.request(character)
+
+        return changed
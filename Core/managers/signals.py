@@ -12,14 +12,14 @@ DamageType = Literal[
 ]
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArgDamageCollect:
     source: EntityID
     target: CharacterID
     damage_type: DamageType = 'common'
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArgPreDamage:
     damage: int
     source: EntityID
@@ -27,7 +27,7 @@ class ArgPreDamage:
     damage_type: DamageType = 'common'
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArgDamage:
     true_damage: int
     source: EntityID
@@ -35,7 +35,31 @@ class ArgDamage:
     damage_type: DamageType = 'common'
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
+class ArgBatchDamageCollect:
+    source: EntityID
+    targets: list[CharacterID]
+    damage_type: DamageType = 'common'
+
+
+@dataclass(kw_only=True, slots=True)
+class ArgBatchPreDamage:
+    """damages 与 targets 一一对应，监听者可逐目标修改"""
+    damages: list[int]
+    source: EntityID
+    targets: list[CharacterID]
+    damage_type: DamageType = 'common'
+
+
+@dataclass(kw_only=True, slots=True)
+class ArgBatchDamage:
+    true_damages: list[int]
+    source: EntityID
+    targets: list[CharacterID]
+    damage_type: DamageType = 'common'
+
+
+@dataclass(kw_only=True, slots=True)
 class ArgCouldAddStatus:
     effective: bool
     source: EntityID
@@ -43,40 +67,40 @@ class ArgCouldAddStatus:
     status: Status
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArgPreAddStatus:
     source: EntityID
     target: CharacterID
     status: Status
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArgAddStatus:
     source: EntityID
     target: CharacterID
     status: StatusID
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArgPreRemoveStatus:
     effective: bool
     source: EntityID
     status: StatusID
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArgRemoveStatus:
     source: EntityID
     status: StatusID
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArgDead:
     character: CharacterID
     source: EntityID
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ArgHealth:
     source: EntityID
     target: CharacterID
@@ -98,6 +122,10 @@ class Signals:
         self.pre_damage: Signal[ArgPreDamage] = Signal[ArgPreDamage]('pre_damage')
         self.damage: Signal[ArgDamage] = Signal[ArgDamage]('damage')
 
+        self.batch_damage_collect: Signal[ArgBatchDamageCollect] = Signal[ArgBatchDamageCollect]('batch_damage_collect')
+        self.batch_pre_damage: Signal[ArgBatchPreDamage] = Signal[ArgBatchPreDamage]('batch_pre_damage')
+        self.batch_damage: Signal[ArgBatchDamage] = Signal[ArgBatchDamage]('batch_damage')
+
         self.health: Signal[ArgHealth] = Signal[ArgHealth]('health')
 
         self.could_add_status: Signal[ArgCouldAddStatus] = Signal[ArgCouldAddStatus]('could_add_status')
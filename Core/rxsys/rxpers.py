@@ -1,4 +1,4 @@
-from typing import Generic, Optional, Any
+from typing import Generic, Optional, Any, Callable, TypeAlias
 
 from .common import (
     ValueT,
@@ -12,6 +12,8 @@ from .common import (
 from ..entity import EntityID
 from ..signal import SignalBus, Signal, Slot
 
+WatcherT: TypeAlias = Callable[[EntityID, ValueT], None]
+
 
 class RxPers(Generic[ValueT]):
     """
@@ -28,6 +30,20 @@ class RxPers(Generic[ValueT]):
 
         self.signal_bus.register(self.signal)
 
+        self.watchers: list[WatcherT[ValueT]] = []
+
+    def watch(self, watcher: WatcherT[ValueT]) -> None:
+        """监听持久化值的变化，仅在 request、mutate、direct_modify 使存储值改变时通知，注册不通知"""
+        self.watchers.append(watcher)
+
+    def _store(self, entity: EntityID, value: ValueT) -> None:
+        if self.watchers and self.values[entity] != value:
+            self.values[entity] = value
+            for watcher in self.watchers:
+                watcher(entity, value)
+        else:
+            self.values[entity] = value
+
     def register(self, target: EntityID, value: ValueT) -> 'RxPers[ValueT]':
         self.values[target] = value
 
@@ -88,7 +104,31 @@ class RxPers(Generic[ValueT]):
             arg=arg,
         )
 
-        self.values[entity] = arg.current()
+        self._store(entity, arg.current())
+
+        return self.values[entity]
+
+    def mutate(self, entity: EntityID, modifier: CallbackT[ValueT]) -> ValueT:
+        """
+        一次性持久化修改，等价于在信号末尾临时连接一个一次性槽后 request
+
+        既有修改按原顺序先执行，modifier 最后执行，不在信号上留下任何槽
+        """
+        if entity not in self.values:
+            raise ValueError(f'unknown target {entity.uuid}')
+
+        arg: ArgRx[ValueT] = ArgRx[ValueT](
+            value=self.values[entity],
+            target=entity,
+        )
+
+        self.signal_bus.emit(
+            signal=self.signal,
+            arg=arg,
+        )
+        modifier(arg)
+
+        self._store(entity, arg.current())
 
         return self.values[entity]
 
@@ -105,7 +145,7 @@ class RxPers(Generic[ValueT]):
         if target not in self.values:
             raise ValueError(f'unknown target {target.uuid}')
 
-        self.values[target] = value
+        self._store(target, value)
 
 
 def irxpers_once(rxpers: RxPers[int], value: int, target: EntityID):
@@ -1,6 +1,7 @@
 from .common import (
     ValueT,
     ArgRx,
+    CallbackT,
 )
 from .rxpers import RxPers
 from ..entity import EntityID
@@ -46,3 +47,6 @@ class RxTemp(RxPers[ValueT]):
             raise ValueError(f'Unknown entity {entity.uuid}')
 
         return self.dynamic_values[entity]
+
+    def mutate(self, entity: EntityID, modifier: CallbackT[ValueT]) -> ValueT:
+        raise RuntimeError('RxTemp does not support persistent mutation')
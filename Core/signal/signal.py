@@ -73,6 +73,10 @@ class Signal(Generic[ArgT]):
     def get_orders(self) -> dict[int, tuple[int, Slot[ArgT]]]:
         return self.orders
 
+    def has_listeners(self) -> bool:
+        """是否存在已连接的槽（含未清理的失效槽），为 False 时 emit 必然无效果"""
+        return bool(self.orders)
+
     def export_slots(self) -> list[Slot[ArgT]]:
         return list(slot for _, slot in sorted(self.orders.values()))
 
@@ -79,6 +79,14 @@ class SignalBus:
     def disconnect(signal: Signal[ArgT], callback: CallbackT[ArgT]) -> Optional[Slot[ArgT]]:
         return signal.disconnect(callback)
 
+    def has_listeners(self, signal: Signal[Any]) -> bool:
+        """除信号自身的槽外，依赖该信号启停的槽同样视为监听者"""
+        return (
+                signal.has_listeners() or
+                signal in self.start_dep or
+                signal in self.end_dep
+        )
+
     def emit(self, signal: Signal[ArgT], arg: ArgT) -> None:
         if signal in self.start_dep:
             for slot in self.start_dep.pop(signal):
@@ -0,0 +1,323 @@
+"""
+性能基准，用法：python benchmark.py [基准名 ...]，不指定则全部运行
+"""
+import sys
+import time
+
+from main import GameProcess
+
+
+class _SampledProcess(GameProcess):
+    """每回合清理前采样 hp 信号上的槽数"""
+
+    def __init__(self, seed=1999):
+        self.hp_peak: int = 0
+        super().__init__(seed)
+
+    def process(self):
+        signal = self.gs.attributes.characters.hp.get_signal()
+        self.hp_peak = max(self.hp_peak, len(signal.get_orders()))
+        super().process()
+
+
+def bench_hp_slots(games: int = 200, max_turn: int = 50) -> None:
+    """50 回合模拟中 hp 信号的槽数与吞吐"""
+    gp = _SampledProcess(1999)
+    signal = gp.gs.attributes.characters.hp.get_signal()
+
+    connected = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        gp.simulate(0, max_turn=max_turn)
+        # simulate 开始时 clear 会重置序号，结束时序号即本局连接过的槽数
+        connected += signal._order
+    elapsed = time.perf_counter() - start
+
+    print('[hp_slots]')
+    print(f'  对局数: {games}  最大回合: {max_turn}')
+    print(f'  每局连接 hp 槽数: {connected / games:.2f}')
+    print(f'  回合末 hp 槽峰值: {gp.hp_peak}')
+    print(f'  吞吐: {games / elapsed:.1f} 局/秒')
+
+
+def bench_damage_event(events: int = 100000) -> None:
+    """单次 take_damage_direct 的耗时，伤害为 0 以保持局面不变"""
+    gp = GameProcess(1999)
+    gs = gp.gs
+    source, target = list(gs.relations.characters.get_all_items())[:2]
+
+    start = time.perf_counter()
+    for _ in range(events):
+        gs.take_damage_direct(0, target, source, 'common')
+    elapsed = time.perf_counter() - start
+
+    print('[damage_event]')
+    print(f'  事件数: {events}')
+    print(f'  每次伤害: {elapsed / events * 1e6:.2f} us')
+
+
+def bench_env_steps(games: int = 300) -> None:
+    """GameEnv 随机合法行动的单步吞吐"""
+    import numpy as np
+    from env import GameEnv
+
+    env = GameEnv(GameProcess(1999))
+    rng = np.random.default_rng(1999)
+
+    steps = 0
+    start = time.perf_counter()
+    for game in range(games):
+        _, mask = env.reset(game % 2)
+        done = False
+        while not done:
+            _, mask, done, _ = env.step(int(rng.choice(np.flatnonzero(mask))))
+            steps += 1
+    elapsed = time.perf_counter() - start
+
+    print('[env_steps]')
+    print(f'  对局数: {games}  行动空间: {env.num_actions}  观测长度: {env.obs_size}')
+    print(f'  吞吐: {steps / elapsed:.0f} 步/秒')
+
+
+def bench_phases(games: int = 200) -> None:
+    """各回合阶段的累计耗时"""
+    gp = GameProcess(1999)
+    gp.gs.turn_start_phases.reset_timings()
+    gp.gs.turn_end_phases.reset_timings()
+
+    start = time.perf_counter()
+    for _ in range(games):
+        gp.simulate(0)
+    elapsed = time.perf_counter() - start
+
+    print('[phases]')
+    print(f'  对局数: {games}  总耗时: {elapsed:.2f} 秒')
+    for pipeline, timings in gp.gs.export_phase_timings().items():
+        for name, timing in timings.items():
+            print(
+                f'  {pipeline}.{name}: 执行 {timing["calls"]:.0f} 跳过 {timing["skipped"]:.0f} '
+                f'耗时 {timing["seconds"]:.3f} 秒 ({timing["seconds"] / elapsed:.1%})'
+            )
+
+
+def bench_containers(rounds: int = 2000) -> None:
+    """默认对阵中各技能容器的加载与执行吞吐，每轮重新加载以保持角色存活"""
+    gp = GameProcess(1999)
+    gs, es = gp.gs, gp.es
+
+    loads = runs = 0
+    load_time = run_time = 0.0
+    for _ in range(rounds):
+        gp.clear()
+        start = time.perf_counter()
+        gp.load()
+        load_time += time.perf_counter() - start
+        loads += len(es.containers)
+
+        for skill in list(es.containers):
+            need = es.export_container_need(skill)
+            selections = [list(characters)[:num] for num, characters in need]
+            start = time.perf_counter()
+            es.run_container(skill, selections)
+            run_time += time.perf_counter() - start
+            runs += 1
+
+    print('[containers]')
+    print(f'  容器数: {loads // rounds}  轮数: {rounds}')
+    print(f'  加载(含对局注册): {loads / load_time:.0f} 容器/秒')
+    print(f'  执行: {runs / run_time:.0f} 容器/秒')
+
+
+def bench_reset(resets: int = 2000) -> None:
+    """对局重置延迟：clear + load 与原地 reset"""
+    gp = GameProcess(1999)
+    gp.loader.file_reload = False
+
+    start = time.perf_counter()
+    for _ in range(resets):
+        gp.clear()
+        gp.load()
+    reload = (time.perf_counter() - start) / resets
+
+    start = time.perf_counter()
+    for _ in range(resets):
+        gp.reset()
+    reset = (time.perf_counter() - start) / resets
+
+    print('[reset]')
+    print(f'  次数: {resets}')
+    print(f'  clear + load: {reload * 1e6:.0f} us')
+    print(f'  reset: {reset * 1e6:.0f} us')
+
+
+def bench_simulate(games: int = 1000) -> None:
+    """simulate 单进程吞吐"""
+    gp = GameProcess(1999)
+
+    turns = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        turns += gp.simulate(0)[1]
+    elapsed = time.perf_counter() - start
+
+    print('[simulate]')
+    print(f'  对局数: {games}  平均回合: {turns / games:.2f}')
+    print(f'  吞吐: {games / elapsed:.1f} 局/秒')
+
+
+class _CountingPolicy:
+    """统计策略调用次数与决策数，每次调用附加固定开销模拟模型推理"""
+
+    def __init__(self, policy, overhead: float = 0.0) -> None:
+        self.policy = policy
+        self.overhead: float = overhead
+        self.calls: int = 0
+        self.rows: int = 0
+
+    def decide_batch(self, obs, masks):
+        self.calls += 1
+        self.rows += len(obs)
+        if self.overhead:
+            time.sleep(self.overhead)
+        return self.policy.decide_batch(obs, masks)
+
+
+def bench_policy_batch(games: int = 400, envs: int = 32, overhead: float = 0.001) -> None:
+    """每次策略调用附加 1 ms 开销时，逐决策与批量决策的吞吐；envs 为每个工作进程的并发对局数"""
+    from policy import BatchSimulator, RandomPolicy
+
+    print('[policy_batch]')
+    print(f'  对局数: {games}  单次调用开销: {overhead * 1e3:.1f} ms')
+
+    gp = GameProcess(1999)
+    policies = (_CountingPolicy(RandomPolicy(0), overhead), _CountingPolicy(RandomPolicy(1), overhead))
+    start = time.perf_counter()
+    for i in range(games):
+        gp.simulate(i % 2, policies=policies)
+    elapsed = time.perf_counter() - start
+    calls = sum(p.calls for p in policies)
+    rows = sum(p.rows for p in policies)
+    print(f'  逐决策: {games / elapsed:.1f} 局/秒  每次调用决策数: {rows / calls:.2f}')
+
+    for envs_per_worker in (1, envs):
+        policies = (_CountingPolicy(RandomPolicy(0), overhead), _CountingPolicy(RandomPolicy(1), overhead))
+        with BatchSimulator(policies, envs_per_worker=envs_per_worker) as sim:
+            # 预热一轮，排除工作进程启动
+            sim.run(sim.num_envs * envs_per_worker)
+            for p in policies:
+                p.calls = p.rows = 0
+            start = time.perf_counter()
+            sim.run(games)
+            elapsed = time.perf_counter() - start
+        calls = sum(p.calls for p in policies)
+        rows = sum(p.rows for p in policies)
+        print(
+            f'  批量 ({sim.num_envs} 进程 × {envs_per_worker} 对局): {games / elapsed:.1f} 局/秒  '
+            f'每次调用决策数: {rows / calls:.2f}'
+        )
+
+
+def bench_telemetry(games: int = 500, rounds: int = 8) -> None:
+    """开启逐局遥测的额外开销"""
+    import tempfile
+
+    from telemetry import Telemetry, TelemetryReader
+
+    gp = GameProcess(1999)
+    gp.simulate(0)
+
+    def _run() -> float:
+        start = time.perf_counter()
+        for i in range(games):
+            gp.simulate(i % 2, seed=i)
+        return time.perf_counter() - start
+
+    # 交替测量并取各自最快一轮，减少宿主负载波动的影响
+    plain: list[float] = []
+    recorded: list[float] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(rounds):
+            gp.telemetry = None
+            plain.append(_run())
+            gp.telemetry = Telemetry(directory, chunk=1024)
+            recorded.append(_run())
+            gp.telemetry.close()
+        records = len(TelemetryReader(directory))
+
+    print('[telemetry]')
+    print(f'  对局数: {games} x {rounds}  记录数: {records}')
+    print(f'  关闭: {games / min(plain):.1f} 局/秒')
+    print(f'  开启: {games / min(recorded):.1f} 局/秒  开销: {(min(recorded) / min(plain) - 1) * 100:.1f}%')
+
+
+def _cold_init() -> None:
+    import simulate
+
+    simulate.game_process('config.toml')
+
+
+def bench_pool_start(processes: int = 4, jobs: int = 5, games: int = 32) -> None:
+    """工作进程启动延迟、每进程内存，以及连续多次小任务时复用进程池的收益"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    import simulate
+
+    print('[pool_start]')
+    print(f'  工作进程: {processes}')
+
+    # 冷启动：各工作进程自行构建游戏进程（须在父进程预热前测量）
+    start = time.monotonic()
+    with ProcessPoolExecutor(
+            processes,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_cold_init,
+    ) as executor:
+        workers: dict = {}
+        while len(workers) < processes:
+            for pid, ready, rss, pss in executor.map(simulate._probe, [start] * processes):
+                workers.setdefault(pid, (ready, rss, pss))
+    latency = max(ready for ready, _, _ in workers.values())
+    rss = sum(rss for _, rss, _ in workers.values()) / len(workers) / 1024
+    pss = sum(pss for _, _, pss in workers.values()) / len(workers) / 1024
+    print(f'  冷启动: 启动 {latency * 1e3:.0f} ms  RSS {rss:.1f} MB  PSS {pss:.1f} MB')
+
+    with simulate.WorkerPool(processes) as pool:
+        for line in pool.report():
+            print(f'  预热: {line}')
+
+        start = time.perf_counter()
+        for i in range(jobs):
+            simulate.run(games, i, show_progress=False, pool=pool)
+        reused = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(jobs):
+        simulate.run(games, i, processes=processes, show_progress=False)
+    fresh = time.perf_counter() - start
+    print(f'  {jobs} 次 {games} 局任务: 每次新建进程池 {fresh:.2f} 秒  复用进程池 {reused:.2f} 秒')
+
+
+BENCHMARKS = {
+    'hp_slots': bench_hp_slots,
+    'damage_event': bench_damage_event,
+    'env_steps': bench_env_steps,
+    'phases': bench_phases,
+    'containers': bench_containers,
+    'reset': bench_reset,
+    'simulate': bench_simulate,
+    'policy_batch': bench_policy_batch,
+    'telemetry': bench_telemetry,
+    'pool_start': bench_pool_start,
+}
+
+
+def main(names: list[str]) -> None:
+    for name in names or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            raise ValueError(f'unknown benchmark {name}')
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
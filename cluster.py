@@ -0,0 +1,375 @@
+"""
+基于共享目录的多机批量模拟
+
+协调方把种子区间切成任务文件放入共享目录（NFS 等，本机目录亦可），任意主机上的工作进程
+以重命名原子领取任务、周期性更新心跳文件，完成后把结果分片写回；协调方把心跳超时的
+领取放回队列，全部分片到齐后合并汇总。除共享文件系统外不需要任何网络服务
+
+目录结构：
+    run.json            任务参数与配置哈希，工作进程据此校验本机配置一致
+    queue/<任务>         待领取
+    claimed/<任务>@<工作进程>  已领取
+    heartbeats/<工作进程>  心跳，修改时间即最近一次心跳
+    results/<任务>.npy   结果分片，结构同 simulate.result_dtype
+
+任务名为 <起始序号>-<数量>，结果与领取次数、工作进程无关，重复完成的任务结果相同
+
+用法：
+    python cluster.py submit 目录 [-n 种子数] [-c 块大小] [-s 种子] [--config A] [--variant B] [--swap]
+    python cluster.py work 目录 [-p 进程数]          # 各主机上运行
+    python cluster.py coordinate 目录 [--timeout 秒] [--db 结果库]
+    python cluster.py status 目录
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from io import BytesIO
+from typing import Optional
+
+import numpy as np
+
+from simulate import Paired, Summary, game_process, policy_key, print_summary, result_dtype, simulate_block
+from store import ResultStore, config_digest
+
+_DIRECTORIES = ('queue', 'claimed', 'heartbeats', 'results')
+
+
+def _job_name(start: int, count: int) -> str:
+    return f'{start:012d}-{count}'
+
+
+def _job_range(name: str) -> tuple[int, int]:
+    start, count = name.split('-')
+    return int(start), int(count)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """先写临时文件再原子替换，读取方不会看到残缺文件"""
+    temp = f'{path}.{socket.gethostname()}.{os.getpid()}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(data)
+    os.replace(temp, path)
+
+
+def load_spec(directory: str) -> dict:
+    with open(os.path.join(directory, 'run.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def submit(
+        directory: str,
+        games: int,
+        seed: int,
+        chunk: int = 256,
+        configs: tuple[str, ...] = ('config.toml',),
+        swap: bool = False,
+) -> int:
+    """
+    建立任务目录并写入全部任务文件
+
+    :return: 任务数
+    """
+    if os.path.exists(os.path.join(directory, 'run.json')):
+        raise RuntimeError(f'{directory} already holds a run')
+
+    for name in _DIRECTORIES:
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+
+    jobs = 0
+    for start in range(0, games, chunk):
+        open(os.path.join(directory, 'queue', _job_name(start, min(chunk, games - start))), 'wb').close()
+        jobs += 1
+
+    spec = {
+        'games': games,
+        'seed': seed,
+        'configs': list(configs),
+        'hashes': [config_digest(config)[0] for config in configs],
+        'seats': 2 if swap else 1,
+        'streams': swap or len(configs) > 1,
+        'jobs': jobs,
+    }
+    # run.json 最后写入，工作进程看到它时任务已全部就绪
+    _write_atomic(os.path.join(directory, 'run.json'), json.dumps(spec, indent=2).encode())
+    return jobs
+
+
+def claim(directory: str, worker: str) -> Optional[str]:
+    """领取一个任务，重命名失败说明已被其他工作进程领取，换下一个"""
+    queue = os.path.join(directory, 'queue')
+    names = os.listdir(queue)
+    # 打乱顺序，减少多个工作进程争抢同一文件
+    random.shuffle(names)
+    for name in names:
+        try:
+            os.rename(os.path.join(queue, name), os.path.join(directory, 'claimed', f'{name}@{worker}'))
+        except FileNotFoundError:
+            continue
+        return name
+    return None
+
+
+class Heartbeat:
+    """后台线程每 interval 秒更新心跳文件的修改时间"""
+
+    def __init__(self, directory: str, worker: str, interval: float) -> None:
+        self.path: str = os.path.join(directory, 'heartbeats', worker)
+        self.interval: float = interval
+        self.stopped: threading.Event = threading.Event()
+        self.beat()
+        self.thread: threading.Thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def beat(self) -> None:
+        with open(self.path, 'a'):
+            pass
+        # 不指定时间，NFS 上由服务器设为服务器时间，不受各主机时钟偏差影响
+        os.utime(self.path)
+
+    def _loop(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.beat()
+
+    def close(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def work(directory: str, worker: Optional[str] = None, interval: float = 5.0, poll: float = 1.0) -> int:
+    """
+    领取并完成任务，队列与领取都为空时退出
+
+    :param worker: 工作进程标识，默认为主机名与进程号
+    :param interval: 心跳间隔（秒），须明显短于协调方的超时
+    :param poll: 队列暂空但仍有他人领取的任务时的轮询间隔（秒）
+    :return: 完成的任务数
+    """
+    worker = f'{socket.gethostname()}-{os.getpid()}' if worker is None else worker
+    spec = load_spec(directory)
+    for config, expected in zip(spec['configs'], spec['hashes']):
+        if config_digest(config)[0] != expected:
+            raise RuntimeError(f'{config} differs from the submitted configuration')
+
+    gps = [game_process(config) for config in spec['configs']]
+    dtype = result_dtype(len(gps), spec['seats'])
+    results = os.path.join(directory, 'results')
+    done = 0
+
+    heartbeat = Heartbeat(directory, worker, interval)
+    try:
+        while True:
+            name = claim(directory, worker)
+            if name is None:
+                # 他人领取的任务可能超时被放回队列；先查领取再查队列，放回是原子重命名，不会漏看
+                if not os.listdir(os.path.join(directory, 'claimed')) and not os.listdir(os.path.join(directory, 'queue')):
+                    return done
+                time.sleep(poll)
+                continue
+
+            path = os.path.join(results, f'{name}.npy')
+            # 超时放回的任务可能已由原领取方完成
+            if not os.path.exists(path):
+                start, count = _job_range(name)
+                block = np.zeros(count, dtype=dtype)
+                simulate_block(gps, block, spec['seed'] + start, spec['streams'])
+                _write_atomic(path, _npy_bytes(block))
+                done += 1
+            try:
+                os.remove(os.path.join(directory, 'claimed', f'{name}@{worker}'))
+            except FileNotFoundError:
+                # 已被协调方放回队列，领取方看到结果已存在会直接释放
+                pass
+    finally:
+        heartbeat.close()
+
+
+def _npy_bytes(array: np.ndarray) -> bytes:
+    buffer = BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def _work_process(directory: str, interval: float) -> None:
+    work(directory, interval=interval)
+
+
+def work_local(directory: str, processes: int = 0, interval: float = 5.0) -> None:
+    """本机启动多个工作进程，父进程先构建游戏进程，分叉后共享"""
+    spec = load_spec(directory)
+    for config in spec['configs']:
+        game_process(config)
+
+    context = multiprocessing.get_context('fork')
+    workers = [
+        context.Process(target=_work_process, args=(directory, interval))
+        for _ in range(processes or os.cpu_count() or 1)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+
+def _server_now(directory: str) -> float:
+    """共享文件系统上的当前时间，与心跳文件的修改时间同源"""
+    path = os.path.join(directory, 'heartbeats', f'.clock-{socket.gethostname()}-{os.getpid()}')
+    with open(path, 'a'):
+        pass
+    os.utime(path)
+    now = os.stat(path).st_mtime
+    os.remove(path)
+    return now
+
+
+def requeue_stale(directory: str, timeout: float) -> int:
+    """
+    心跳超时或心跳文件不存在的领取放回队列，结果已存在的领取直接删除
+
+    :return: 放回的任务数
+    """
+    claimed = os.path.join(directory, 'claimed')
+    heartbeats = os.path.join(directory, 'heartbeats')
+    now = _server_now(directory)
+    requeued = 0
+    for entry in os.listdir(claimed):
+        name, _, worker = entry.partition('@')
+        source = os.path.join(claimed, entry)
+        try:
+            if os.path.exists(os.path.join(directory, 'results', f'{name}.npy')):
+                os.remove(source)
+                continue
+            # 心跳在领取前建立，正常退出前已释放全部领取，心跳文件不存在即工作进程已不在
+            heartbeat = os.path.join(heartbeats, worker)
+            if not os.path.exists(heartbeat) or now - os.stat(heartbeat).st_mtime > timeout:
+                os.rename(source, os.path.join(directory, 'queue', name))
+                requeued += 1
+        except FileNotFoundError:
+            # 工作进程刚好完成并删除了领取
+            continue
+    return requeued
+
+
+def status(directory: str) -> dict[str, int]:
+    spec = load_spec(directory)
+    return {
+        'jobs': spec['jobs'],
+        'queued': len(os.listdir(os.path.join(directory, 'queue'))),
+        'claimed': len(os.listdir(os.path.join(directory, 'claimed'))),
+        'done': sum(name.endswith('.npy') for name in os.listdir(os.path.join(directory, 'results'))),
+        'workers': sum(not name.startswith('.') for name in os.listdir(os.path.join(directory, 'heartbeats'))),
+    }
+
+
+def merge(directory: str) -> np.ndarray:
+    """合并全部结果分片为按种子序号索引的结果数组"""
+    spec = load_spec(directory)
+    records = np.zeros(spec['games'], dtype=result_dtype(len(spec['configs']), spec['seats']))
+    results = os.path.join(directory, 'results')
+    for file in os.listdir(results):
+        if file.endswith('.npy'):
+            start, count = _job_range(file[:-4])
+            records[start:start + count] = np.load(os.path.join(results, file))
+    return records
+
+
+def coordinate(
+        directory: str,
+        timeout: float = 30.0,
+        poll: float = 2.0,
+        show_progress: bool = True,
+) -> tuple[Summary, np.ndarray]:
+    """
+    放回超时的领取直至全部分片到齐，合并后汇总
+
+    :return: (汇总, 合并的结果数组)，汇总的吞吐为协调期间的整体吞吐
+    """
+    summary = Summary()
+    while True:
+        requeue_stale(directory, timeout)
+        state = status(directory)
+        if show_progress:
+            print(
+                f"\r分片 {state['done']}/{state['jobs']}  排队 {state['queued']}  "
+                f"领取 {state['claimed']}  工作进程 {state['workers']}",
+                end='',
+                file=sys.stderr,
+                flush=True,
+            )
+        if state['done'] >= state['jobs']:
+            break
+        time.sleep(poll)
+    if show_progress:
+        print(file=sys.stderr)
+
+    records = merge(directory)
+    summary.add(records)
+    return summary, records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parser_submit = commands.add_parser('submit', help='建立任务目录')
+    parser_submit.add_argument('directory')
+    parser_submit.add_argument('-n', '--games', type=int, default=1000, help='种子数')
+    parser_submit.add_argument('-c', '--chunk', type=int, default=256, help='每个任务的种子数')
+    parser_submit.add_argument('-s', '--seed', type=int, default=None, help='起始种子，默认随机')
+    parser_submit.add_argument('--config', default='config.toml', help='配置文件（变体 A）')
+    parser_submit.add_argument('--variant', default=None, help='变体 B 的配置文件，与 A 以相同种子配对')
+    parser_submit.add_argument('--swap', action='store_true', help='每个种子再以玩家 2 先手进行一局')
+
+    parser_work = commands.add_parser('work', help='领取并完成任务')
+    parser_work.add_argument('directory')
+    parser_work.add_argument('-p', '--processes', type=int, default=0, help='本机工作进程数，0 表示 CPU 数')
+    parser_work.add_argument('--interval', type=float, default=5.0, help='心跳间隔（秒）')
+
+    parser_coordinate = commands.add_parser('coordinate', help='放回超时任务，完成后合并汇总')
+    parser_coordinate.add_argument('directory')
+    parser_coordinate.add_argument('--timeout', type=float, default=30.0, help='心跳超时（秒）')
+    parser_coordinate.add_argument('--confidence', type=float, default=0.95, help='置信水平')
+    parser_coordinate.add_argument('--db', default=None, help='合并结果写入的 SQLite 结果库')
+
+    parser_status = commands.add_parser('status', help='查看任务进度')
+    parser_status.add_argument('directory')
+
+    args = parser.parse_args()
+
+    if args.command == 'submit':
+        seed = random.randint(0, 100000) if args.seed is None else args.seed
+        configs = (args.config,) if args.variant is None else (args.config, args.variant)
+        jobs = submit(args.directory, args.games, seed, args.chunk, configs, args.swap)
+        print(f'任务: {jobs}  种子: {seed}')
+    elif args.command == 'work':
+        work_local(args.directory, args.processes, args.interval)
+    elif args.command == 'status':
+        for key, value in status(args.directory).items():
+            print(f'{key}: {value}')
+    else:
+        spec = load_spec(args.directory)
+        summary, records = coordinate(args.directory, args.timeout)
+        paired = None
+        if len(spec['configs']) > 1 or spec['seats'] > 1:
+            paired = Paired(len(spec['configs']))
+            paired.add(records)
+        if args.db is not None:
+            with ResultStore(args.db) as store:
+                hashes = [store.register(config) for config in spec['configs']]
+                if hashes != spec['hashes']:
+                    raise RuntimeError('configuration changed since the run was submitted')
+                store.save(records, hashes, policy_key(spec['streams']), spec['seed'])
+        print_summary(summary, spec['seed'], args.confidence, paired)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+"""
+面向学习型智能体的扁平整数行动空间
+
+一局内所有 (技能, 目标分配) 组合在 reset 时枚举为固定编号，
+合法行动掩码与定长观测向量均为 NumPy 数组，智能体每步只需调用一次 step
+"""
+import argparse
+import sys
+from typing import Literal, TypeAlias, get_args
+
+import numpy as np
+
+from Core.entity import CharacterID, PlayerID, SkillID, StatusName
+from main import GameProcess
+
+PickT: TypeAlias = tuple[Literal['fixed', 'pick', 'none', 'all'], CharacterID | None, str]
+
+STATUS_NAMES: tuple[str, ...] = get_args(StatusName)
+SLOT_FIELDS: tuple[str, ...] = ('hp', 'attack', 'defense', 'alive') + STATUS_NAMES
+"""每个角色槽位的观测字段"""
+
+
+class GameEnv:
+    """
+    行动编号在同一配置下稳定：玩家按注册顺序，角色、技能按 uuid 顺序，
+    单体选择器按候选角色 uuid 展开，另有一个空选择（none），仅在该选择器没有可选角色时合法，
+    与随机策略在无候选时以空选择出手一致；全体选择器与施法者不占编号
+
+    胜负由双方存活与可用技能判定，与 GameProcess._rand_play 相同，不依赖目标掩码
+    """
+
+    def __init__(self, gp: GameProcess | None = None, max_turn: int = 50) -> None:
+        self.gp: GameProcess = GameProcess() if gp is None else gp
+        self.gs = self.gp.gs
+        self.es = self.gp.es
+        self.max_turn: int = max_turn
+
+        self.players: list[PlayerID] = []
+        self.characters: list[CharacterID] = []
+        """观测槽位对应的角色"""
+        self._members: list[list[CharacterID]] = []
+        """各玩家的角色，按 uuid 排列，reset 时构建，逐步判定时不再查询关系表"""
+        self.actions: list[tuple[SkillID, list[PickT]]] = []
+
+        self._owner: np.ndarray = np.empty(0, dtype=np.int8)
+        self._skill: np.ndarray = np.empty(0, dtype=np.int32)
+        self._picks: np.ndarray = np.empty((0, 0), dtype=np.int32)
+        self._nones: np.ndarray = np.empty((0, 0, 0), dtype=np.int32)
+        self._skills: list[SkillID] = []
+
+        self.turn: int = 0
+        self.current: int = 0
+        self._acted: int = 0
+
+    @property
+    def num_actions(self) -> int:
+        return len(self.actions)
+
+    @property
+    def obs_size(self) -> int:
+        return len(self.characters) * len(SLOT_FIELDS)
+
+    def _build(self) -> None:
+        """枚举本局行动，并预计算向量化掩码所需的索引"""
+        gs = self.gs
+        relations = gs.relations
+
+        self.players = relations.players.get_item_list()
+        members = [
+            sorted(relations.characters.get_children(player), key=lambda c: c.uuid)
+            for player in self.players
+        ]
+        self._members = members
+        self.characters = [character for characters in members for character in characters]
+        slot_of = {character: i for i, character in enumerate(self.characters)}
+
+        self.actions = []
+        self._skills = []
+        owners: list[int] = []
+        skill_index: list[int] = []
+        picks: list[list[int]] = []
+        nones: list[list[list[int]]] = []
+        for index, characters in enumerate(members):
+            for character in characters:
+                for skill in sorted(relations.skills.get_children(character), key=lambda s: s.uuid):
+                    self._skills.append(skill)
+                    selectors = self.es.containers[skill].selectors
+
+                    assignments: list[list[PickT]] = [[]]
+                    for preset in selectors:
+                        if preset == 'caster':
+                            options: list[PickT] = [('fixed', character, preset)]
+                        elif preset.endswith('_all'):
+                            options = [('all', None, preset)]
+                        else:
+                            candidates = [
+                                c
+                                for other, others in enumerate(members)
+                                if (other == index) == (preset == 'ally_one')
+                                for c in others
+                            ]
+                            options = [('pick', c, preset) for c in candidates]
+                            options.append(('none', None, preset))
+                        assignments = [done + [option] for done in assignments for option in options]
+
+                    for assignment in assignments:
+                        self.actions.append((skill, assignment))
+                        owners.append(index)
+                        skill_index.append(len(self._skills) - 1)
+                        picks.append([slot_of[c] for kind, c, _ in assignment if kind == 'pick'])
+                        # 空选择合法当且仅当该选择器的候选全部不可选
+                        nones.append([
+                            [
+                                slot_of[c]
+                                for other, others in enumerate(members)
+                                if (other == index) == (preset == 'ally_one')
+                                for c in others
+                            ]
+                            for kind, _, preset in assignment if kind == 'none'
+                        ])
+
+        width = max((len(p) for p in picks), default=0)
+        groups = max((len(n) for n in nones), default=0)
+        candidates = max((len(g) for n in nones for g in n), default=0)
+        # 以 len(characters) 作为恒真、len(characters) + 1 作为恒假的哨兵槽位
+        sentinel = len(self.characters)
+        self._owner = np.array(owners, dtype=np.int8)
+        self._skill = np.array(skill_index, dtype=np.int32)
+        self._picks = np.full((len(picks), width), sentinel, dtype=np.int32)
+        for i, p in enumerate(picks):
+            self._picks[i, :len(p)] = p
+        self._nones = np.full((len(nones), groups, candidates), sentinel + 1, dtype=np.int32)
+        for i, n in enumerate(nones):
+            for j, g in enumerate(n):
+                self._nones[i, j, :len(g)] = g
+
+    def _targetable(self) -> np.ndarray:
+        """各槽位角色能否被单体选择器选中，末两位为恒真、恒假哨兵"""
+        characters = self.gs.attributes.characters
+        count = len(self.characters)
+        res = np.ones(count + 2, dtype=bool)
+        res[-1] = False
+        res[:count] = np.fromiter(map(characters.alive.current, self.characters), dtype=bool, count=count)
+        res[:count] &= np.fromiter(map(characters.in_play.current, self.characters), dtype=bool, count=count)
+        return res
+
+    def legal_mask(self, player: int | None = None) -> np.ndarray:
+        """玩家（默认当前行动方）的合法行动掩码，长度为 num_actions"""
+        player = self.current if player is None else player
+        actions = self.gs.actions
+        actions.refresh()
+        usable = np.fromiter(
+            (actions.is_usable(skill) for skill in self._skills),
+            dtype=bool,
+            count=len(self._skills),
+        )
+        mask = usable[self._skill] & (self._owner == player)
+        if self._picks.shape[1] or self._nones.shape[1]:
+            targetable = self._targetable()
+            if self._picks.shape[1]:
+                mask &= targetable[self._picks].all(axis=1)
+            if self._nones.shape[1]:
+                mask &= ~targetable[self._nones].any(axis=2).any(axis=1)
+        return mask
+
+    def defeated(self, player: int) -> bool:
+        """玩家没有存活角色或没有可用技能即判负"""
+        if not any(map(self.gs.attributes.characters.alive.current, self._members[player])):
+            return True
+        return not self.gs.get_usable_skills(self.players[player])
+
+    def observe(self) -> np.ndarray:
+        """定长观测向量，按槽位依次排列 SLOT_FIELDS"""
+        gs = self.gs
+        characters = gs.attributes.characters
+        statuses = gs.relations.statuses
+        status_tags = gs.tags.statuses.item_to_tags
+        width = len(SLOT_FIELDS)
+
+        obs = np.zeros(self.obs_size, dtype=np.float32)
+        for i, character in enumerate(self.characters):
+            base = i * width
+            obs[base] = characters.hp.current(character)
+            obs[base + 1] = characters.attack.request(character)
+            obs[base + 2] = characters.defense.request(character)
+            obs[base + 3] = characters.alive.current(character)
+            for status in statuses.get_children(character):
+                for key, value in status_tags.get(status, ()):
+                    if key == 'name' and value in STATUS_NAMES:
+                        obs[base + 4 + STATUS_NAMES.index(value)] += 1
+        return obs
+
+    def reset(self, first: int = 0, seed: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        开始新对局
+
+        :param first: 先手玩家索引
+        :param seed: 指定则重新设置随机种子
+        :return: 观测、先手方合法行动掩码
+        """
+        return self.restore(first, seed, [])
+
+    def _run(self, action: int) -> None:
+        skill, assignment = self.actions[action]
+        selections: list[list[CharacterID]] = []
+        for kind, character, preset in assignment:
+            if kind == 'all':
+                caster = self.es.casters[skill]
+                selections.append(list(self.gs.character_selector(caster, preset)[1]))
+            elif kind == 'none':
+                selections.append([])
+            else:
+                selections.append([character])
+        self.gp.act(skill, selections)
+
+    def step(self, action: int) -> tuple[np.ndarray, np.ndarray, bool, int]:
+        """
+        当前行动方执行行动，推进到下一行动方
+
+        下一行动方没有存活角色或可用技能即判负；超过最大回合为平局
+
+        :return: 观测、下一行动方合法行动掩码、是否结束、战败方索引（未结束或平局为 -1）
+        """
+        done, loser = self._advance(action)
+        if done:
+            return self.observe(), np.zeros(self.num_actions, dtype=bool), True, loser
+        return self.observe(), self.legal_mask(), False, -1
+
+    def _advance(self, action: int) -> tuple[bool, int]:
+        self._run(action)
+
+        self.current = 1 - self.current
+        self._acted += 1
+        if self._acted == 2:
+            self._acted = 0
+            self.gp.process()
+            self.turn += 1
+            if self.turn > self.max_turn:
+                return True, -1
+            self.gp.turn_start()
+
+        if self.defeated(self.current):
+            return True, self.current
+        return False, -1
+
+    def restore(self, first: int, seed: int | None, actions: list[int]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        以 reset(first, seed) 开始并依次执行 actions，重建对局局面，中间步骤不计算观测与掩码
+
+        游戏系统为进程内单例，同一进程中的多个对局以此切换；行动须为原对局中未结束时的行动，
+        seed 为空时延续当前随机序列，不能用于重建
+
+        :return: 观测、当前行动方合法行动掩码
+        """
+        self.gp.reset(seed)
+        self._build()
+
+        self.turn = 1
+        self.current = first
+        self._acted = 0
+        self.gp.turn_start()
+        for action in actions:
+            self._advance(action)
+        return self.observe(), self.legal_mask()
+
+    def action_of(self, skill: SkillID, selections: list[list[CharacterID]]) -> int:
+        """当前局面下与 (技能, 目标) 决策对应的行动编号，不存在时为 -1"""
+        target = [set(selection) for selection in selections]
+        for action, (candidate, assignment) in enumerate(self.actions):
+            if candidate != skill:
+                continue
+            chosen = []
+            for kind, character, preset in assignment:
+                if kind == 'all':
+                    chosen.append(self.gs.character_selector(self.es.casters[skill], preset)[1])
+                elif kind == 'none':
+                    chosen.append(set())
+                else:
+                    chosen.append({character})
+            if chosen == target:
+                return action
+        return -1
+
+
+def crosscheck(gp: GameProcess, seeds: range, max_turn: int = 50) -> list[tuple[int, tuple[int, int], tuple[int, int]]]:
+    """
+    回归检查：每个种子先由 GameProcess._rand_play 随机对局并记录决策，
+    再把同一决策序列逐步交给 GameEnv，两条路径的 (战败方, 回合) 应相同
+
+    :return: 不一致的 (种子, _rand_play 结果, GameEnv 结果)
+    """
+    env = GameEnv(gp, max_turn=max_turn)
+    mismatches = []
+    for seed in seeds:
+        decisions: list[tuple[SkillID, list[list[CharacterID]]]] = []
+        act = gp.act
+
+        def _record(skill: SkillID, selections: list[list[CharacterID]]) -> None:
+            decisions.append((skill, selections))
+            act(skill, selections)
+
+        gp.act = _record
+        try:
+            gp.reset(seed)
+            expected = gp._rand_play(0, max_turn)
+        finally:
+            del gp.act
+
+        env.reset(0, seed)
+        actual = (-1, env.turn)
+        for skill, selections in decisions:
+            action = env.action_of(skill, selections)
+            if action < 0 or not env.legal_mask()[action]:
+                actual = (-2, env.turn)
+                break
+            _, _, done, loser = env.step(action)
+            if done:
+                actual = (loser, env.turn)
+                break
+        else:
+            if env.defeated(env.current):
+                actual = (env.current, env.turn)
+
+        if actual != expected:
+            mismatches.append((seed, expected, actual))
+    return mismatches
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='GameEnv 与随机对局的一致性检查')
+    parser.add_argument('--config', default='config.toml')
+    parser.add_argument('-n', '--games', type=int, default=500)
+    args = parser.parse_args()
+
+    gp = GameProcess(config=args.config)
+    gp.loader.file_reload = False
+    mismatches = crosscheck(gp, range(args.games))
+    for seed, expected, actual in mismatches[:10]:
+        print(f'种子 {seed}: _rand_play {expected}  GameEnv {actual}')
+    print(f'不一致: {len(mismatches)}/{args.games}')
+    sys.exit(1 if mismatches else 0)
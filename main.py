@@ -1,30 +1,27 @@
 import random
 import tomllib
-
-from mypy.typeops import false_only
+from typing import Any, Optional
 
 from Core import EffectSys
 from Core import GameLoader
 from Core import GameSys
-from Core.entity import ContainerID, CharacterID
+from Core.common import UUID, deep_copy
+from Core.entity import ContainerID, CharacterID, PlayerID, SkillID
 
 
 class GameProcess:
-    def __init__(self, seed=1999):
+    def __init__(self, seed=1999, config: str = 'config.toml'):
+        """
+        :param config: 配置文件路径，可为同一进程内的多个变体各建一个 GameProcess，
+            游戏系统为单例，每局 reset 时按各自配置重建
+        """
         self.seed = seed
-        with open('config.toml', 'r', encoding='utf-8') as f:
-            config = tomllib.loads(f.read())
-
-        self.gs = GameSys()
-        self.gs.print_signal_args = config['gamesys']['print_signal_args']
-
-        self.es = EffectSys()
-        self.loader = GameLoader(
-            **(config['loader']),
-            gs=self.gs,
-            es=self.es,
-        )
-
+        self.config = config
+        self._env = None
+        """simulate 使用策略时复用的 GameEnv"""
+        self.telemetry = None
+        """逐局遥测（见 telemetry.Telemetry），为空则不记录"""
+        self.loader: Optional[GameLoader] = None
         self.ready()
 
     def get_allowed_skills(self):
@@ -54,19 +51,31 @@ class GameProcess:
 
         return self.gs.export_dict()
 
+    def rand_decide(self, player: PlayerID) -> Optional[tuple[SkillID, list[list[CharacterID]]]]:
+        """均匀随机策略，直接使用内部 ID，无可用技能返回 None"""
+        skills = self.gs.get_usable_skills(player)
+        if not skills:
+            return None
+
+        skill = random.choice(skills)
+        return skill, [
+            random.sample(list(characters), k=num) if characters else []
+            for num, characters in self.es.export_container_need(skill)
+        ]
+
+    def act(self, skill: SkillID, selections: list[list[CharacterID]]) -> None:
+        """仿真内部执行技能，直接使用内部 ID，不导出局面"""
+        if self.telemetry is not None:
+            self.telemetry.skill(skill)
+        self.es.run_container(skill, selections)
+
     def rand_run(self, playerid: int) -> int:
-        allowed = self.get_allowed_skills()[playerid]
-        skills = [key for inner_dict in allowed.values() for key, v in inner_dict.items() if v]
-        if len(skills) == 0:
+        decision = self.rand_decide(PlayerID(playerid))
+        if decision is None:
             return playerid
-        else:
-            skill = random.choice(skills)
-            need = self.get_need_selections(skill)
-            self.run_container(
-                skill,
-                [random.sample(selections, k=num) if selections else [] for num, selections in need]
-            )
-            return 0
+
+        self.act(*decision)
+        return 0
 
     def get_dict(self):
         return self.gs.export_dict()
@@ -74,30 +83,69 @@ class GameProcess:
     def ready(self):
         """重新加载准备"""
         random.seed(self.seed)
-        with open('config.toml', 'r', encoding='utf-8') as f:
+        with open(self.config, 'r', encoding='utf-8') as f:
             config = tomllib.loads(f.read())
 
         self.gs = GameSys()
         self.gs.print_signal_args = config['gamesys']['print_signal_args']
+        self.gs.turn_end_phases.get('clean_up').every = config['gamesys'].get('clean_up_every', 1)
 
         self.es = EffectSys()
-        self.loader = GameLoader(
-            **(config['loader']),
-            gs=self.gs,
-            es=self.es,
-        )
+        # 加载器跨 ready 保留，已解析的配置与配置监视器的变化记录不丢失
+        if self.loader is None:
+            self.loader = GameLoader(
+                **(config['loader']),
+                gs=self.gs,
+                es=self.es,
+            )
+        else:
+            self.loader.configure(**(config['loader']))
         self.loader.ready()
+        if config.get('effectsys', {}).get('print_imports', False):
+            print(self.es.export_import_report())
 
     def load(self):
         """不重载准备"""
         self.loader.ready()
 
+    def reset(self, seed: Optional[int] = None):
+        """
+        原地重置对局，复用已分配的结构、已加载的配置与已编译的容器，不访问文件系统
+
+        :param seed: 指定则重新设置随机种子，否则延续当前随机序列
+        """
+        if seed is not None:
+            self.seed = seed
+            random.seed(seed)
+        self.loader.reset()
+        if self.telemetry is not None:
+            self.telemetry.begin(self, seed)
+
+    def checkpoint(self) -> tuple[Any, ...]:
+        """
+        导出当前局面的检查点（游戏系统、效果系统、uuid 与随机状态的深拷贝），用 rollback 恢复
+
+        已加载的配置与编译结果不复制，检查点只在同一次 ready 之后有效
+        """
+        keep = (self.gs, self.es, self.loader)
+        return deep_copy((self.gs.__dict__, self.es.__dict__), keep), UUID().uuid, random.getstate()
+
+    def rollback(self, checkpoint: tuple[Any, ...]) -> None:
+        """恢复到检查点，检查点不被消耗，可多次恢复"""
+        (gs_state, es_state), uuid, state = checkpoint
+        gs_state, es_state = deep_copy((gs_state, es_state), (self.gs, self.es, self.loader))
+        self.gs.__dict__.clear()
+        self.gs.__dict__.update(gs_state)
+        self.es.__dict__.clear()
+        self.es.__dict__.update(es_state)
+        UUID().uuid = uuid
+        random.setstate(state)
+
     def turn_start(self):
         self.gs.turn_start()
 
     def process(self):
         self.gs.process()
-        self.gs.clean_up()
 
     def clear(self):
         self.loader.clear()
@@ -126,30 +174,67 @@ class GameProcess:
         result = hp_header + ''.join(formatted_hps)
         print(result)
 
-    def simulate(self, player_index: int = -1, max_turn=50) -> tuple[int, int]:
-        """返回战败方"""
+    def simulate(
+            self,
+            player_index: int = -1,
+            max_turn=50,
+            policies=None,
+            seed: Optional[int] = None,
+            streams: bool = False,
+    ) -> tuple[int, int]:
+        """
+        返回战败方
+
+        :param policies: 按座位索引的两个策略（见 policy.Policy），为空则双方随机
+        :param player_index: 先手方，不为 0 或 1 时随机选择（指定 seed 时由 seed 决定）
+        :param seed: 指定则本局开始前重新设置随机种子，可单独复现
+        :param streams: 随机策略下每个决策点由 (seed, 回合, 先后手) 单独设种，
+            需同时指定 seed；配置变体或先后手互换的配对对局中，某一步随机数用量不同不会错开后续决策
+        """
 
         if self.loader.file_reload:
             self.loader.file_reload = False
             # print('[Simulate] 模拟已自动关闭文件重读')
 
-        players = self.export_player_id()
-        player_index = random.randint(0, 1) if player_index not in [0, 1] else player_index
+        if player_index not in [0, 1]:
+            # 指定种子时先手由种子决定且不消耗本局随机序列，seed 相同的对局完全复现
+            player_index = random.randint(0, 1) if seed is None else random.Random(seed).randint(0, 1)
 
-        self.clear()
-        self.load()
+        if policies is not None:
+            from env import GameEnv
+            from policy import play
+
+            if self._env is None or self._env.max_turn != max_turn:
+                self._env = GameEnv(self, max_turn=max_turn)
+            res = play(self._env, policies, player_index, seed)
+        else:
+            self.reset(seed)
+            res = self._rand_play(player_index, max_turn, seed if streams else None)
+
+        if self.telemetry is not None:
+            self.telemetry.end(player_index, *res)
+        return res
+
+    def _rand_play(self, player_index: int, max_turn: int, streams: Optional[int] = None) -> tuple[int, int]:
+        players = self.gs.relations.players.get_item_list()
         turn = 1
 
         while turn <= max_turn:
             self.turn_start()
-            res = self.rand_run(players[player_index])
-            if res:
-                return players.index(res), turn
+            if streams is not None:
+                random.seed(streams << 16 | turn << 1)
+            decision = self.rand_decide(players[player_index])
+            if decision is None:
+                return player_index, turn
+            self.act(*decision)
 
             player_index = 1 - player_index
-            res = self.rand_run(players[player_index])
-            if res:
-                return players.index(res), turn
+            if streams is not None:
+                random.seed(streams << 16 | turn << 1 | 1)
+            decision = self.rand_decide(players[player_index])
+            if decision is None:
+                return player_index, turn
+            self.act(*decision)
 
             player_index = 1 - player_index
             self.process()
@@ -0,0 +1,275 @@
+"""
+策略接口与批量决策仿真
+
+策略基于 GameEnv 的整数行动空间，一次评估一批决策：
+输入观测矩阵 (B, obs_size) 与合法行动掩码 (B, num_actions)，返回行动编号 (B,)
+
+游戏系统为进程内单例，BatchSimulator 的每个工作进程以确定性重放轮流承载多个对局，
+每轮收集所有对局当前的决策请求，按座位分组后每个策略只评估一次
+"""
+import multiprocessing
+import os
+from multiprocessing.connection import Connection
+from typing import Callable, Optional, Protocol
+
+import numpy as np
+
+from env import GameEnv
+from main import GameProcess
+
+
+class Policy(Protocol):
+    def decide_batch(self, obs: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        """每行至少有一个合法行动，返回每行所选行动编号"""
+        ...
+
+
+def masked_argmax(scores: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    return np.where(masks, scores, -np.inf).argmax(axis=1)
+
+
+class RandomPolicy:
+    """合法行动中均匀随机"""
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+
+    def decide_batch(self, obs: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        return masked_argmax(self.rng.random(masks.shape), masks)
+
+
+class ScriptedPolicy:
+    """逐行调用脚本函数 (观测, 掩码) -> 行动"""
+
+    def __init__(self, script: Callable[[np.ndarray, np.ndarray], int]) -> None:
+        self.script: Callable[[np.ndarray, np.ndarray], int] = script
+
+    def decide_batch(self, obs: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        return np.array([self.script(o, m) for o, m in zip(obs, masks)], dtype=np.int64)
+
+
+class LinearPolicy:
+    """线性打分模型，scores = obs @ weights + bias，取合法行动中得分最高者"""
+
+    def __init__(self, weights: np.ndarray, bias: Optional[np.ndarray] = None) -> None:
+        self.weights: np.ndarray = weights
+        self.bias: np.ndarray = np.zeros(weights.shape[1]) if bias is None else bias
+
+    def decide_batch(self, obs: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        return masked_argmax(obs @ self.weights + self.bias, masks)
+
+
+def play(
+        env: GameEnv,
+        policies: tuple[Policy, Policy],
+        first: int = 0,
+        seed: Optional[int] = None,
+) -> tuple[int, int]:
+    """
+    进程内进行一局，policies 按座位索引
+
+    :return: 战败方索引（平局为 -1）、结束回合，与 GameProcess.simulate 一致
+    """
+    obs, mask = env.reset(first, seed)
+    while True:
+        action = policies[env.current].decide_batch(obs[None], mask[None])[0]
+        obs, mask, done, loser = env.step(int(action))
+        if done:
+            return loser, env.turn
+
+
+class _EnvSlots:
+    """
+    工作进程中的多个对局槽
+
+    游戏系统为进程内单例，同一时刻只有一个对局在游戏系统中；其他槽只保存 (先手, 种子, 行动序列)，
+    轮到时以 GameEnv.restore 重建。重建为确定性重放，结果与独占进程相同
+    """
+
+    def __init__(self, seed: int, max_turn: int) -> None:
+        gp = GameProcess(seed)
+        gp.loader.file_reload = False
+        self.env: GameEnv = GameEnv(gp, max_turn=max_turn)
+        # 先建立一局以确定观测长度与行动空间
+        self.env.reset(0, seed)
+        self.games: dict[int, tuple[int, int, list[int]]] = {}
+        """槽 -> (先手, 种子, 已执行行动)"""
+        self.live: int = -1
+        """当前在游戏系统中的槽"""
+        self.restores: int = 0
+
+    def handle(self, requests: list[tuple[int, int, int, int]]) -> tuple[np.ndarray, ...]:
+        """
+        :param requests: 每项为 (槽, 行动, 先手, 种子)，行动为 -1 表示以先手、种子开始新对局
+        :return: 与 requests 对应的观测、掩码、是否结束、战败方、当前行动方、回合，各为堆叠数组
+        """
+        env = self.env
+        # 先处理已在游戏系统中的槽，少重建一次
+        order = sorted(range(len(requests)), key=lambda i: requests[i][0] != self.live)
+        obs = np.empty((len(requests), env.obs_size), dtype=np.float32)
+        masks = np.empty((len(requests), env.num_actions), dtype=bool)
+        states = np.empty((len(requests), 4), dtype=np.int32)
+        for i in order:
+            slot, action, first, seed = requests[i]
+            if action < 0:
+                self.games[slot] = (first, seed, [])
+                obs[i], masks[i] = env.reset(first, seed)
+                done, loser = False, -1
+            else:
+                first, seed, actions = self.games[slot]
+                if self.live != slot:
+                    env.restore(first, seed, actions)
+                    self.restores += 1
+                actions.append(action)
+                obs[i], masks[i], done, loser = env.step(action)
+            self.live = slot
+            if done:
+                del self.games[slot]
+            states[i] = (done, loser, env.current, env.turn)
+        return obs, masks, states[:, 0].astype(bool), states[:, 1], states[:, 2], states[:, 3]
+
+
+def _env_worker(conn: Connection, seed: int, max_turn: int) -> None:
+    slots = _EnvSlots(seed, max_turn)
+    while True:
+        cmd, data = conn.recv()
+        if cmd != 'step':
+            break
+        conn.send(slots.handle(data))
+    conn.close()
+
+
+class BatchSimulator:
+    """
+    多进程并发对局，批量评估决策
+
+    每个工作进程承载 envs_per_worker 个对局槽，每轮按进程收发一次堆叠的观测与掩码，
+    全部进程的决策请求按座位合并后每个策略每轮只评估一次。
+    游戏系统为进程内单例，同一进程中的对局轮流以确定性重放切换（见 GameEnv.restore），
+    每次决策的重放开销随对局进度增长：策略评估昂贵时增大 envs_per_worker 换取更大的批，
+    廉价策略宜取 1
+
+    对局 i 的种子为 seed + i，结果按对局序号排列；同一 seed、进程数与槽数下整个运行可复现
+
+    用法：
+        with BatchSimulator((RandomPolicy(), LinearPolicy(w)), envs_per_worker=16) as sim:
+            results = sim.run(10000)
+    """
+
+    def __init__(
+            self,
+            policies: tuple[Policy, Policy],
+            num_envs: int = 0,
+            seed: int = 1999,
+            max_turn: int = 50,
+            envs_per_worker: int = 1,
+    ) -> None:
+        """
+        :param num_envs: 工作进程数，0 表示 CPU 数
+        :param envs_per_worker: 每个工作进程的并发对局数，每批最多 num_envs × envs_per_worker 个决策
+        """
+        self.policies: tuple[Policy, Policy] = policies
+        self.num_envs: int = num_envs or os.cpu_count() or 1
+        self.envs_per_worker: int = envs_per_worker
+        self.seed: int = seed
+
+        self.conns: list[Connection] = []
+        self.processes: list[multiprocessing.Process] = []
+        for i in range(self.num_envs):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_env_worker,
+                args=(child, seed + i, max_turn),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def run(self, games: int, first: int = -1, seed: Optional[int] = None) -> np.ndarray:
+        """
+        :param first: 先手座位，-1 表示按对局序号交替
+        :param seed: 起始种子，默认为构造时的 seed
+        :return: 每局 (先手, 战败方, 回合)，按对局序号排列
+        """
+        seed = self.seed if seed is None else seed
+        results = np.empty((games, 3), dtype=np.int32)
+        slots = [(worker, slot) for slot in range(self.envs_per_worker) for worker in range(self.num_envs)]
+        playing: dict[tuple[int, int], int] = {}
+        """槽 -> 对局序号"""
+        requests: dict[tuple[int, int], tuple[int, int, int, int]] = {}
+
+        def _start(key: tuple[int, int], game: int) -> None:
+            playing[key] = game
+            game_first = game % 2 if first == -1 else first
+            requests[key] = (key[1], -1, game_first, seed + game)
+            results[game, 0] = game_first
+
+        started = 0
+        for key in slots[:games]:
+            _start(key, started)
+            started += 1
+
+        while requests:
+            keys = sorted(requests)
+            for worker in range(self.num_envs):
+                batch = [requests[key] for key in keys if key[0] == worker]
+                if batch:
+                    self.conns[worker].send(('step', batch))
+
+            obs_parts, mask_parts, seat_parts, pending = [], [], [], []
+            for worker in range(self.num_envs):
+                worker_keys = [key for key in keys if key[0] == worker]
+                if not worker_keys:
+                    continue
+                obs, masks, done, loser, current, turn = self.conns[worker].recv()
+                for i, key in enumerate(worker_keys):
+                    if done[i]:
+                        results[playing.pop(key), 1:] = (loser[i], turn[i])
+                    else:
+                        pending.append(key)
+                keep = ~done
+                obs_parts.append(obs[keep])
+                mask_parts.append(masks[keep])
+                seat_parts.append(current[keep])
+
+            requests = {}
+            if pending:
+                obs = np.concatenate(obs_parts)
+                masks = np.concatenate(mask_parts)
+                seats = np.concatenate(seat_parts)
+                actions = np.empty(len(pending), dtype=np.int64)
+                for seat, policy in enumerate(self.policies):
+                    index = np.flatnonzero(seats == seat)
+                    if len(index):
+                        actions[index] = policy.decide_batch(obs[index], masks[index])
+                for key, action in zip(pending, actions):
+                    requests[key] = (key[1], int(action), 0, 0)
+
+            # 结束的槽按槽序号开始新对局
+            for key in slots:
+                if started >= games:
+                    break
+                if key not in playing:
+                    _start(key, started)
+                    started += 1
+
+        return results
+
+    def close(self) -> None:
+        for conn in self.conns:
+            try:
+                conn.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        self.conns.clear()
+        self.processes.clear()
+
+    def __enter__(self) -> 'BatchSimulator':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
@@ -1,85 +1,406 @@
+"""
+多会话游戏服务（websockets）
+
+每个连接以对局 ID 创建或加入对局，各对局互不干扰：
+    {"cmd": "create", "data": {"match": 可选 ID, "seed": 可选种子}}
+    {"cmd": "join", "data": {"match": ID}}
+    {"cmd": "leave", "data": null}
+未加入对局时首个游戏命令自动创建私有对局，旧客户端无需修改；ready 重新开始当前对局
+
+游戏系统为进程内单例，同一时刻只能承载一局：全部游戏命令由单个执行线程串行执行，
+每局保存种子与改变局面的命令日志，切换对局时 reset 到该局种子后重放日志。
+重放直接执行技能容器，不导出局面；日志每增长 checkpoint_every 条，对局保存一个检查点（局面深拷贝，
+只保留最新一个），切换时从检查点恢复后只重放其后的命令，切换开销不随对局长度增长。
+短对局没有检查点，内存仅为命令日志；命令出错时当前局面可能已部分修改，下次执行时按日志（不含出错命令）重建
+
+各连接的消息进入各自的命令队列，按序处理；队列中已积压的连续游戏命令一次交给执行线程，
+期间对局保持在游戏系统中，减少切换与重放。对局池有上限，空闲超时的对局被回收，
+单局命令日志超出上限时拒绝继续（局面内存上限）
+
+ready 重新读取配置文件并重新加载后再开始对局；配置有变化时其他对局之后按新配置重放
+"""
+import argparse
 import asyncio
 import json
-from typing import cast
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, cast
 
 import websockets
 
+from Core.entity import CharacterID, ContainerID
 from main import GameProcess
 
-gp = GameProcess()
+GAME_COMMANDS = (
+    'get_allowed_skills',
+    'get_need_selections',
+    'run_container',
+    'get_dict',
+    'clear',
+    'process',
+    'ready',
+)
 
+MUTATING_COMMANDS = ('run_container', 'clear', 'process')
+"""改变局面的命令，记入对局日志供重放"""
 
-async def main():
-    host: str = '127.0.0.1'
-    port: int = 1999
 
-    print(f'[Server] 监听 ws://{host}:{port}')
-    async with websockets.serve(process, host, port):
-        await asyncio.Future()
+class Match:
+    def __init__(self, match_id: str, seed: int) -> None:
+        self.id: str = match_id
+        self.seed: int = seed
+        self.log: list[tuple[str, Any]] = []
+        """(命令, 参数)，重放时按序执行"""
+        self.checkpoint: Optional[tuple[int, Any]] = None
+        """(日志长度, GameProcess.checkpoint)，恢复时只重放该长度之后的日志"""
+        self.connections: int = 0
+        self.last_used: float = time.monotonic()
+        self.evicted: bool = False
 
 
-async def process(websocket):
-    addr = websocket.remote_address
-    print(f'[Server] {addr} 已连接')
+class MatchPool:
+    """
+    对局池
 
-    try:
-        while True:
-            message = await websocket.recv()
-            print(f'[Server] 收到消息: {message}')
+    execute 只能在单个执行线程中调用；其余方法只在事件循环线程中调用
+    """
 
-            response = await run_cmd(message)
+    def __init__(
+            self,
+            gp: GameProcess,
+            max_matches: int = 1000,
+            idle_timeout: float = 600.0,
+            max_log: int = 10000,
+            checkpoint_every: int = 512,
+    ) -> None:
+        """
+        :param max_matches: 对局数上限，满时回收无连接且最久未用的对局，仍满则拒绝创建
+        :param idle_timeout: 超过该秒数未执行命令的对局被回收
+        :param max_log: 单局命令日志上限
+        :param checkpoint_every: 日志每增长该条数保存一次检查点，切换对局最多重放该条数，0 则不保存
+        """
+        self.gp: GameProcess = gp
+        self.max_matches: int = max_matches
+        self.idle_timeout: float = idle_timeout
+        self.max_log: int = max_log
+        self.checkpoint_every: int = checkpoint_every
+        self.matches: OrderedDict[str, Match] = OrderedDict()
+        """按最近使用排列"""
+        self.active: Optional[Match] = None
+        """当前游戏系统中的对局，为空则下次执行时重建"""
+        self.replays: int = 0
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(1, thread_name_prefix='game')
 
-            await websocket.send(response)
-    except websockets.exceptions.ConnectionClosed:
-        print(f'[Server] {addr} 断开连接')
-    except Exception as e:
-        print(f'[Server] 错误: {e}')
+    def create(self, match_id: Optional[str] = None, seed: Optional[int] = None) -> Match:
+        if match_id is None:
+            match_id = secrets.token_hex(8)
+        elif match_id in self.matches:
+            raise ValueError(f'对局已存在: {match_id}')
 
+        if len(self.matches) >= self.max_matches:
+            idle = next((match for match in self.matches.values() if not match.connections), None)
+            if idle is None:
+                raise RuntimeError('对局数已达上限')
+            self.evict(idle)
 
-async def run_cmd(data_json: str) -> str:
-    try:
-        data = json.loads(data_json)
-        if not isinstance(data, dict):
-            raise ValueError('异常数据类型')
-
-        if 'cmd' not in data or 'data' not in data:
-            raise ValueError('数据键异常')
-
-        cmd = cast(str, data['cmd'])
-        cmd_data = data['data']
-
-        print('[Server] 接受命令', cmd)
-        print('[Server] 接受数据', cmd_data)
-
-        if cmd in [
-            'get_allowed_skills',
-            'get_need_selections',
-            'run_container',
-            'get_dict',
-            'clear',
-            'process',
-            'ready'
-        ]:
-            if cmd_data is not None:
-                res = getattr(gp, cmd)(**cmd_data)
-            else:
-                res = getattr(gp, cmd)()
+        match = Match(match_id, secrets.randbelow(2 ** 31) if seed is None else seed)
+        self.matches[match_id] = match
+        return match
+
+    def get(self, match_id: str) -> Match:
+        match = self.matches.get(match_id)
+        if match is None:
+            raise ValueError(f'对局不存在: {match_id}')
+        return match
+
+    def evict(self, match: Match) -> None:
+        match.evicted = True
+        self.matches.pop(match.id, None)
+        # 只在事件循环线程中改写，执行线程下次读到时按引用比较，被回收的对局不会再被执行
+        if self.active is match:
+            self.active = None
+
+    def evict_idle(self) -> int:
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [match for match in self.matches.values() if match.last_used < deadline]
+        for match in idle:
+            self.evict(match)
+        return len(idle)
+
+    def touch(self, match: Match) -> None:
+        match.last_used = time.monotonic()
+        self.matches.move_to_end(match.id)
+
+    def _restore(self, match: Match) -> None:
+        """恢复到对局最新的检查点（没有则重置到对局种子）并重放其后的日志"""
+        if match.checkpoint is None:
+            start = 0
+            self.gp.reset(match.seed)
         else:
-            raise ValueError('未知命令')
+            start, checkpoint = match.checkpoint
+            self.gp.rollback(checkpoint)
+        for cmd, data in match.log[start:]:
+            _replay(self.gp, cmd, data)
+        self.active = match
+        self.replays += 1
+        self._checkpoint(match)
+
+    def _checkpoint(self, match: Match) -> None:
+        """当前对局的日志自上个检查点起增长满 checkpoint_every 条时保存检查点"""
+        done = match.checkpoint[0] if match.checkpoint is not None else 0
+        if self.checkpoint_every and len(match.log) - done >= self.checkpoint_every:
+            match.checkpoint = (len(match.log), self.gp.checkpoint())
+
+    def _reload(self) -> None:
+        """
+        重新读取配置文件并重新加载（同 GameProcess.ready）
+
+        配置文件有变化时缓存的对阵注册步骤随之丢弃；各对局的检查点失效，之后按日志重放并重新保存
+        """
+        loader = self.gp.loader
+        if loader.reload_changed():
+            loader.blueprints.clear()
+        for match in self.matches.values():
+            match.checkpoint = None
+        self.gp.clear()
+        self.gp.ready()
+        self.active = None
+
+    def execute(self, match: Match, cmd: str, data: Any) -> Any:
+        if match.evicted:
+            raise ValueError(f'对局已回收: {match.id}')
+
+        if cmd == 'ready':
+            self._reload()
+            match.log.clear()
+            self._restore(match)
+            return None
+
+        if cmd in MUTATING_COMMANDS and len(match.log) >= self.max_log:
+            raise RuntimeError('对局命令数已达上限')
+        if self.active is not match:
+            self._restore(match)
+
+        try:
+            res = _call(self.gp, cmd, data)
+        except Exception:
+            # 局面可能已部分修改，下次按日志重建
+            self.active = None
+            raise
+        if cmd in MUTATING_COMMANDS:
+            match.log.append((cmd, data))
+            self._checkpoint(match)
+        return res
+
+    def execute_many(self, match: Match, commands: list[tuple[str, Any]]) -> list[tuple[bool, Any]]:
+        """按序执行同一对局的多条命令，单条出错不影响后续命令，返回各条的 (是否成功, 结果或错误信息)"""
+        res: list[tuple[bool, Any]] = []
+        for cmd, data in commands:
+            try:
+                res.append((True, self.execute(match, cmd, data)))
+            except Exception as e:
+                res.append((False, str(e)))
+        return res
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+
+def _call(gp: GameProcess, cmd: str, data: Any) -> Any:
+    if data is not None:
+        return getattr(gp, cmd)(**data)
+    return getattr(gp, cmd)()
+
+
+def _replay(gp: GameProcess, cmd: str, data: Any) -> None:
+    """重放日志中的命令，run_container 不导出局面"""
+    if cmd == 'run_container':
+        gp.es.run_container(
+            ContainerID(data['containerid']),
+            selections=[[CharacterID(uuid) for uuid in selector] for selector in data['selections']],
+        )
+    else:
+        _call(gp, cmd, data)
 
-        response = {
-            'cmd': cmd,
-            'data': res
-        }
-        return json.dumps(response)
 
-    except Exception as e:
-        error_response = {
-            'cmd': 'error',
-            'data': str(e)
-        }
-        return json.dumps(error_response)
+class Session:
+    """单个连接，消息经命令队列按序处理"""
+
+    def __init__(self, pool: MatchPool, websocket, verbose: bool = False) -> None:
+        self.pool: MatchPool = pool
+        self.websocket = websocket
+        self.verbose: bool = verbose
+        self.match: Optional[Match] = None
+        self.queue: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=64)
+
+    def bind(self, match: Optional[Match]) -> None:
+        if self.match is not None:
+            self.match.connections -= 1
+        self.match = match
+        if match is not None:
+            match.connections += 1
+
+    async def serve(self) -> None:
+        addr = self.websocket.remote_address
+        print(f'[Server] {addr} 已连接')
+
+        worker = asyncio.create_task(self._consume())
+        try:
+            # 命令队列满时暂停读取，由 TCP 流控约束过快的客户端
+            async for message in self.websocket:
+                await self.queue.put(message)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:
+            print(f'[Server] 错误: {e}')
+        finally:
+            await self.queue.put(None)
+            await worker
+            self.bind(None)
+            print(f'[Server] {addr} 断开连接')
+
+    async def _consume(self) -> None:
+        while True:
+            messages = [await self.queue.get()]
+            # 取出已积压的消息一并处理，其中连续的游戏命令一次执行
+            while messages[-1] is not None and not self.queue.empty():
+                messages.append(self.queue.get_nowait())
+            done = messages[-1] is None
+            if done:
+                messages.pop()
+
+            for response in await self.run_cmds(messages):
+                try:
+                    await self.websocket.send(response)
+                except websockets.exceptions.ConnectionClosed:
+                    # 继续取出队列中的消息直至结束标记
+                    break
+            if done:
+                return
+
+    async def run_cmds(self, messages: list[str]) -> list[str]:
+        """按序处理多条消息，返回各自的响应"""
+        responses: list[str] = []
+        pending: list[tuple[str, Any]] = []
+
+        async def _flush() -> None:
+            if not pending:
+                return
+            try:
+                match = self._game_match()
+                self.pool.touch(match)
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(self.pool.executor, self.pool.execute_many, match, list(pending))
+            except Exception as e:
+                results = [(False, str(e))] * len(pending)
+            for (cmd, _), (ok, res) in zip(pending, results):
+                try:
+                    responses.append(_response(cmd, res) if ok else _response('error', res))
+                except Exception as e:
+                    responses.append(_response('error', str(e)))
+            pending.clear()
+
+        for message in messages:
+            if self.verbose:
+                print(f'[Server] 收到消息: {message}')
+            try:
+                cmd, cmd_data = _parse(message)
+                if cmd in GAME_COMMANDS:
+                    pending.append((cmd, cmd_data))
+                    continue
+                await _flush()
+                responses.append(_response(cmd, self.run_session_cmd(cmd, cmd_data)))
+            except Exception as e:
+                await _flush()
+                responses.append(_response('error', str(e)))
+        await _flush()
+        return responses
+
+    def _game_match(self) -> Match:
+        """游戏命令所在的对局，未加入时创建私有对局"""
+        if self.match is not None and self.match.evicted:
+            match_id = self.match.id
+            self.bind(None)
+            raise ValueError(f'对局已回收: {match_id}')
+        if self.match is None:
+            self.bind(self.pool.create())
+        return self.match
+
+    def run_session_cmd(self, cmd: str, cmd_data: Any) -> Any:
+        if cmd == 'create':
+            cmd_data = cmd_data or {}
+            self.bind(self.pool.create(cmd_data.get('match'), cmd_data.get('seed')))
+            return {'match': self.match.id, 'seed': self.match.seed}
+        if cmd == 'join':
+            self.bind(self.pool.get(cmd_data['match']))
+            return {'match': self.match.id}
+        if cmd == 'leave':
+            self.bind(None)
+            return None
+        raise ValueError('未知命令')
+
+
+def _parse(data_json: str) -> tuple[str, Any]:
+    data = json.loads(data_json)
+    if not isinstance(data, dict):
+        raise ValueError('异常数据类型')
+
+    if 'cmd' not in data or 'data' not in data:
+        raise ValueError('数据键异常')
+
+    return cast(str, data['cmd']), data['data']
+
+
+def _response(cmd: str, data: Any) -> str:
+    return json.dumps({
+        'cmd': cmd,
+        'data': data
+    })
+
+
+async def evict_loop(pool: MatchPool) -> None:
+    while True:
+        await asyncio.sleep(max(pool.idle_timeout / 4, 1.0))
+        evicted = pool.evict_idle()
+        if evicted:
+            print(f'[Server] 回收空闲对局 {evicted}，剩余 {len(pool.matches)}')
+
+
+async def main(
+        host: str = '127.0.0.1',
+        port: int = 1999,
+        max_matches: int = 1000,
+        idle_timeout: float = 600.0,
+        max_log: int = 10000,
+        checkpoint_every: int = 512,
+        verbose: bool = False,
+) -> None:
+    pool = MatchPool(GameProcess(), max_matches, idle_timeout, max_log, checkpoint_every)
+
+    async def process(websocket):
+        await Session(pool, websocket, verbose).serve()
+
+    print(f'[Server] 监听 ws://{host}:{port}')
+    evictor = asyncio.create_task(evict_loop(pool))
+    try:
+        async with websockets.serve(process, host, port):
+            await asyncio.Future()
+    finally:
+        evictor.cancel()
+        pool.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1999)
+    parser.add_argument('--max-matches', type=int, default=1000, help='对局数上限')
+    parser.add_argument('--idle-timeout', type=float, default=600.0, help='空闲对局回收秒数')
+    parser.add_argument('--max-log', type=int, default=10000, help='单局命令数上限')
+    parser.add_argument('--checkpoint-every', type=int, default=512, help='每多少条命令保存一次对局检查点，0 则不保存')
+    parser.add_argument('-v', '--verbose', action='store_true', help='打印每条消息')
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port, args.max_matches, args.idle_timeout, args.max_log, args.checkpoint_every,
+                     args.verbose))
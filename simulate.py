@@ -1,46 +1,596 @@
+"""
+批量模拟
+
+工作进程数默认取 CPU 数，对局按小块种子区间分发，先完成的块先汇总，
+慢进程只拖慢自己手上的一小块；对局 i 的种子为 seed + i，结果与调度顺序无关
+
+用法：python simulate.py [-n 对局数] [-p 进程数] [-c 块大小] [-s 种子] [-t 遥测目录]
+
+序贯停止：指定 --ci-width 或 --sprt 后 -n 为对局上限，停止规则满足即停止分发，
+在途的块仍会完成并计入结果
+
+配对模拟：--variant 指定变体 B 的配置文件，--swap 使每个种子再以玩家 2 先手进行一局；
+配对时每个决策点单独设种（公共随机数），同一种子在各变体、各座次下的决策随机数对齐，
+报告以种子为单位的配对差值估计及相对独立抽样的方差缩减；-n 为种子数
+
+结果存放在共享内存中的结构化数组，按种子序号索引，工作进程直接写入对应行，
+只回传块的起止，父进程就地读取汇总
+
+工作进程由 WorkerPool 从预热后的父进程分叉，可在同一会话的多次 run 中复用
+
+结果库：--db 指定 SQLite 文件后，已有 (配置哈希, 策略, 种子) 的结果直接读取，只模拟缺失的种子，
+新结果逐块写回；从结果库读取的对局不记录遥测
+"""
+import argparse
+import gc
+import math
 import multiprocessing
+import os
 import random
+import resource
+import sys
 import time
-from functools import partial
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.util import Finalize
+from typing import Callable, Iterator, Optional
 
 import numpy as np
 
 from main import GameProcess
+from stats import SPRT, Moments, StopRule, WilsonWidth, wilson, z_score
+from store import ResultStore
+from telemetry import Telemetry
+
+
+def result_dtype(variants: int = 1, seats: int = 1) -> np.dtype:
+    """每个种子一条记录，按 (变体, 先手座位) 存放战败方与回合"""
+    return np.dtype([
+        ('loser', np.int8, (variants, seats)),
+        ('turns', np.int16, (variants, seats)),
+    ])
+
+
+class SharedResults:
+    """
+    共享内存中的逐种子结果，turns 为 0 表示该种子未运行
+
+    创建方负责 unlink；关闭前须释放对 array 的所有引用，需要保留的数据先复制
+    """
+
+    def __init__(self, games: int, variants: int = 1, seats: int = 1, name: Optional[str] = None) -> None:
+        """
+        :param name: 为空则新建（内容为零），否则连接已有块
+        """
+        self.games: int = games
+        self.variants: int = variants
+        self.seats: int = seats
+        self.dtype: np.dtype = result_dtype(variants, seats)
+        self.shm: SharedMemory = SharedMemory(
+            name=name,
+            create=name is None,
+            size=max(games * self.dtype.itemsize, 1),
+        )
+        self.array: Optional[np.ndarray] = np.ndarray((games,), dtype=self.dtype, buffer=self.shm.buf)
+
+    def spec(self) -> tuple[int, int, int, str]:
+        """工作进程连接所需参数"""
+        return self.games, self.variants, self.seats, self.shm.name
+
+    def close(self) -> None:
+        self.array = None
+        self.shm.close()
+
+    def __enter__(self) -> 'SharedResults':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+        self.shm.unlink()
+
+
+_templates: dict[str, GameProcess] = {}
+"""按配置缓存的游戏进程，WorkerPool 在分叉前于父进程预建，工作进程直接继承"""
+_job: Optional[tuple] = None
+_gps: list[GameProcess] = []
+_results: Optional[SharedResults] = None
+
+
+def game_process(config: str) -> GameProcess:
+    """进程内按配置复用的 GameProcess（关闭文件重读），工作进程与集群节点共用"""
+    gp = _templates.get(config)
+    if gp is None:
+        gp = _templates[config] = GameProcess(config=config)
+        gp.loader.file_reload = False
+    return gp
+
+
+def _release() -> None:
+    if _results is not None:
+        _results.close()
+    for gp in _gps:
+        if gp.telemetry is not None:
+            gp.telemetry.close()
+            gp.telemetry = None
+
+
+def _prepare(job: tuple) -> None:
+    """
+    按任务切换工作进程状态，同一任务的后续块直接复用
+
+    :param job: (遥测目录, 配置变体, 结果共享内存参数)
+    """
+    global _job, _results
+    if job == _job:
+        return
+    if _job is None:
+        # 进程池关闭时工作进程退出前写出剩余遥测并断开共享内存
+        Finalize(None, _release, exitpriority=10)
+    _release()
+
+    telemetry_dir, configs, results = job
+    games, variants, seats, name = results
+    _results = SharedResults(games, variants, seats, name)
+    _gps[:] = [game_process(config) for config in configs]
+    if telemetry_dir is not None:
+        for i, gp in enumerate(_gps):
+            directory = telemetry_dir if len(configs) == 1 else os.path.join(telemetry_dir, f'variant{i}')
+            gp.telemetry = Telemetry(directory)
+    _job = job
+
+
+def _memory() -> tuple[int, int]:
+    """本进程 (RSS, PSS)，单位 KB；PSS 按共享进程数均摊共享页，无 /proc 时为 0"""
+    rss = pss = 0
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Rss:'):
+                    rss = int(line.split()[1])
+                elif line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss, pss
+
+
+def _probe(started: float) -> tuple[int, float, int, int]:
+    """返回 (pid, 距进程池创建的秒数, RSS, PSS)，短暂停留使探测分散到各工作进程"""
+    ready = time.monotonic() - started
+    time.sleep(0.05)
+    return os.getpid(), ready, *_memory()
+
+
+class WorkerPool:
+    """
+    预热的可复用工作进程池
+
+    父进程先导入全部模块、为各配置构建游戏进程（读取并编译配置），gc.freeze() 后以 fork 启动工作进程；
+    工作进程以写时复制共享这些页面，冻结的对象不参与回收，回收时不会触碰共享页；全部工作进程就绪后父进程解冻；
+    同一会话中的多次 run 可复用同一进程池
+    """
+
+    def __init__(self, processes: int = 0, configs: tuple[str, ...] = ('config.toml',)) -> None:
+        self.processes: int = processes or os.cpu_count() or 1
+
+        start = time.monotonic()
+        for config in configs:
+            game_process(config)
+        gc.collect()
+        gc.freeze()
+        self.prewarm: float = time.monotonic() - start
+        """父进程预热耗时（秒）"""
+
+        # 工作进程继承父进程的资源跟踪器，连接共享内存时不会各自启动跟踪器并在退出时误报泄漏
+        resource_tracker.ensure_running()
+
+        start = time.monotonic()
+        # fork 方式下进程池在提交首个任务时一次性启动全部工作进程，此时尚无管理线程
+        self.executor: ProcessPoolExecutor = ProcessPoolExecutor(
+            self.processes,
+            mp_context=multiprocessing.get_context('fork'),
+        )
+        self.workers: dict[int, tuple[float, int, int]] = {}
+        """pid -> (就绪时间, RSS, PSS)"""
+        for _ in range(10):
+            probes = [self.executor.submit(_probe, start) for _ in range(self.processes)]
+            for pid, ready, rss, pss in (future.result() for future in probes):
+                self.workers.setdefault(pid, (ready, rss, pss))
+            if len(self.workers) >= self.processes:
+                break
+        # 工作进程已 fork 并各自保留冻结状态；父进程解冻，预热对象此后照常参与回收
+        gc.unfreeze()
+
+    @property
+    def start_latency(self) -> float:
+        """创建进程池到最后一个工作进程就绪的秒数"""
+        return max(ready for ready, _, _ in self.workers.values())
+
+    def report(self) -> list[str]:
+        rss = [rss for _, rss, _ in self.workers.values()]
+        pss = [pss for _, _, pss in self.workers.values()]
+        return [
+            f'工作进程: {len(self.workers)}  预热 {self.prewarm * 1e3:.0f} ms  '
+            f'启动 {self.start_latency * 1e3:.0f} ms',
+            f'每进程内存: RSS {sum(rss) / len(rss) / 1024:.1f} MB  '
+            f'PSS {sum(pss) / len(pss) / 1024:.1f} MB',
+        ]
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self) -> 'WorkerPool':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def run_chunk(job: tuple, start: int, count: int, seed: int, streams: bool = False) -> tuple[int, int]:
+    """
+    运行种子 [seed + start, seed + start + count)，结果写入共享内存第 [start, start + count) 行
+
+    座位数由共享结果决定：1 为仅玩家 1 先手，2 为再以玩家 2 先手
+    """
+    _prepare(job)
+    simulate_block(_gps, _results.array[start:start + count], seed + start, streams)
+    return start, count
+
+
+def simulate_block(gps: list[GameProcess], block: np.ndarray, seed: int, streams: bool = False) -> None:
+    """运行种子 [seed, seed + len(block))，各变体、座次的结果写入 block（见 result_dtype）"""
+    loser = block['loser']
+    turns = block['turns']
+    for i in range(len(block)):
+        for v, gp in enumerate(gps):
+            for first in range(loser.shape[2]):
+                loser[i, v, first], turns[i, v, first] = gp.simulate(first, seed=seed + i, streams=streams)
+
+
+def policy_key(streams: bool) -> str:
+    """结果库中的策略标识；逐决策点设种时同一种子的对局不同，分开存放"""
+    return 'random-streams' if streams else 'random'
+
+
+def score(loser: np.ndarray) -> np.ndarray:
+    """玩家 1 得分：胜 1，负 0，平局 0.5"""
+    return np.where(loser == 1, 1.0, np.where(loser == 0, 0.0, 0.5))
+
+
+class Summary:
+    """增量汇总"""
+
+    def __init__(self) -> None:
+        self.seeds: int = 0
+        self.games: int = 0
+        self.cached: int = 0
+        """从结果库读取的对局数"""
+        self.losses: list[int] = [0, 0]
+        self.draws: int = 0
+        self.turns: int = 0
+        self.stopped: bool = False
+        """是否因停止规则提前结束"""
+        self.start: float = time.perf_counter()
+
+    def add(self, records: np.ndarray, cached: bool = False) -> None:
+        # 胜率统计只取变体 A，含全部座次
+        loser = records['loser'][:, 0].ravel()
+        self.seeds += len(records)
+        self.games += len(loser)
+        if cached:
+            self.cached += len(loser)
+        self.losses[0] += int((loser == 0).sum())
+        self.losses[1] += int((loser == 1).sum())
+        self.draws += int((loser == -1).sum())
+        self.turns += int(records['turns'][:, 0].sum())
+
+    @property
+    def decided(self) -> int:
+        return self.losses[0] + self.losses[1]
+
+    @property
+    def mean(self) -> float:
+        """分出胜负的对局中战败方索引的均值，即玩家 1 的胜率"""
+        return self.losses[1] / self.decided if self.decided else float('nan')
+
+    def interval(self, confidence: float = 0.95) -> tuple[float, float]:
+        """玩家 1 胜率的 Wilson 区间"""
+        return wilson(self.losses[1], self.decided, confidence)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def rate(self) -> float:
+        """模拟吞吐，不含从结果库读取的对局"""
+        return (self.games - self.cached) / self.elapsed if self.elapsed else 0.0
+
+
+class Paired:
+    """
+    以种子为单位的配对估计
+
+    每个种子先对座次取平均得到各变体的玩家 1 得分，差值为 A - B；
+    与把每局视为独立样本时的标准误对比，得到方差缩减倍数
+    """
+
+    def __init__(self, variants: int) -> None:
+        self.seeds: list[Moments] = [Moments() for _ in range(variants)]
+        self.games: list[Moments] = [Moments() for _ in range(variants)]
+        self.diff: Moments = Moments()
+
+    def add(self, records: np.ndarray) -> None:
+        scores = score(records['loser'])
+        per_seed = scores.mean(axis=2)
+        for v in range(scores.shape[1]):
+            self.seeds[v].add(per_seed[:, v])
+            self.games[v].add(scores[:, v].ravel())
+        if scores.shape[1] > 1:
+            self.diff.add(per_seed[:, 0] - per_seed[:, 1])
+
+    def report(self, confidence: float = 0.95) -> list[str]:
+        z = z_score(confidence)
+        names = 'AB'
+        lines = []
+        for v, (seeds, games) in enumerate(zip(self.seeds, self.games)):
+            independent = games.se
+            lines.append(
+                f'变体 {names[v]} 玩家 1 得分: {seeds.mean:.4f} ± {z * seeds.se:.4f}  '
+                f'标准误 独立 {independent:.4f} / 配对 {seeds.se:.4f}  '
+                f'方差缩减 {_reduction(independent, seeds.se)}'
+            )
+        if self.diff.n:
+            a, b = self.games
+            independent = math.sqrt(a.var / a.n + b.var / b.n)
+            low, high = self.diff.mean - z * self.diff.se, self.diff.mean + z * self.diff.se
+            lines.append(
+                f'差值 A - B: {self.diff.mean:.4f}  {confidence:.0%} 区间 [{low:.4f}, {high:.4f}]  '
+                f'标准误 独立 {independent:.4f} / 配对 {self.diff.se:.4f}  '
+                f'方差缩减 {_reduction(independent, self.diff.se)}'
+            )
+        return lines
+
+
+def _reduction(independent: float, paired: float) -> str:
+    """
+    方差缩减倍数
+
+    配对标准误为 0（如 A/A 对照中各种子差值全为 0）时倍数无界：独立估计有方差则两者逐种子完全一致，
+    否则（样本全同或不足两个种子）无法比较
+    """
+    if math.isnan(independent) or math.isnan(paired):
+        return 'n/a'
+    if paired == 0:
+        return '逐种子完全一致' if independent > 0 else 'n/a'
+    return f'{independent ** 2 / paired ** 2:.2f} 倍'
+
+
+def progress(summary: Summary, total: Optional[int] = None) -> None:
+    """total 为种子数"""
+    done = f'{summary.seeds}/{total}' if total else f'{summary.seeds}'
+    eta = ''
+    if total and summary.rate:
+        per_seed = summary.games / summary.seeds
+        eta = f'  剩余 {(total - summary.seeds) * per_seed / summary.rate:.0f} 秒'
+    print(
+        f'\r已完成 {done}  {summary.rate:.1f} 局/秒  平均值 {summary.mean:.4f}{eta}',
+        end='',
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def run(
+        games: int,
+        seed: int,
+        processes: int = 0,
+        chunk: int = 64,
+        telemetry_dir: Optional[str] = None,
+        show_progress: bool = True,
+        stop: Optional[StopRule] = None,
+        configs: tuple[str, ...] = ('config.toml',),
+        swap: bool = False,
+        paired: Optional[Paired] = None,
+        results: Optional[SharedResults] = None,
+        pool: Optional[WorkerPool] = None,
+        store: Optional[ResultStore] = None,
+) -> Summary:
+    """
+    :param games: 总对局数，指定停止规则时为上限
+    :param processes: 工作进程数，0 表示 CPU 数；传入 pool 时以 pool 为准
+    :param chunk: 每次分发的对局数
+    :param stop: 停止规则，以玩家 1 胜场与分出胜负的对局数调用
+    :param configs: 配置变体，多于一个或 swap 时 games 为种子数，并对每个决策点单独设种
+    :param swap: 每个种子再以玩家 2 先手进行一局
+    :param paired: 配对估计，逐块汇总
+    :param results: 保留逐种子结果的共享内存，须按 games、变体数、座位数创建；为空则内部创建并在结束时释放
+    :param pool: 复用的工作进程池，为空则内部创建；记录遥测时总是使用内部进程池，结束时写出全部分片
+    :param store: 结果库，已有结果的种子不再模拟，新结果逐块写入
+    """
+    seats = 2 if swap else 1
+    if results is not None and (results.games, results.variants, results.seats) != (games, len(configs), seats):
+        raise ValueError('shared results layout does not match the run')
+
+    streams = swap or len(configs) > 1
+    summary = Summary()
+    with ExitStack() as stack:
+        if results is None:
+            results = stack.enter_context(SharedResults(games, len(configs), seats))
+
+        offsets = np.arange(games)
+        save: Optional[Callable[[int, int], None]] = None
+        if store is not None:
+            # 种子须在全部变体、座次下都有结果才视为命中，否则整体重跑后覆盖
+            hashes = [store.register(config) for config in configs]
+            policy = policy_key(streams)
+            cached = store.fill(results.array, hashes, policy, seed)
+            offsets = np.flatnonzero(~cached)
+            if cached.any():
+                records = results.array[cached]
+                summary.add(records, cached=True)
+                if paired is not None:
+                    paired.add(records)
+                del records
+
+            def save(start: int, count: int) -> None:
+                store.save(results.array[start:start + count], hashes, policy, seed + start)
+
+        if len(offsets) and (pool is None or telemetry_dir is not None):
+            pool = stack.enter_context(WorkerPool(processes, configs))
+
+        job = (telemetry_dir, configs, results.spec())
+        summary.start = time.perf_counter()
+        _schedule(
+            pool, job, _ranges(offsets, chunk), games, seed, streams,
+            results, summary, stop, paired, show_progress, save,
+        )
+
+    if show_progress:
+        print(file=sys.stderr)
+    return summary
+
+
+def _ranges(offsets: np.ndarray, chunk: int) -> Iterator[tuple[int, int]]:
+    """将待运行的种子序号拆成连续且不超过 chunk 的 (起点, 数量)"""
+    if not len(offsets):
+        return
+    for segment in np.split(offsets, np.flatnonzero(np.diff(offsets) != 1) + 1):
+        end = int(segment[-1]) + 1
+        for start in range(int(segment[0]), end, chunk):
+            yield start, min(chunk, end - start)
+
+
+def _schedule(
+        pool: Optional[WorkerPool],
+        job: tuple,
+        ranges: Iterator[tuple[int, int]],
+        games: int,
+        seed: int,
+        streams: bool,
+        results: SharedResults,
+        summary: Summary,
+        stop: Optional[StopRule],
+        paired: Optional[Paired],
+        show_progress: bool,
+        save: Optional[Callable[[int, int], None]] = None,
+) -> None:
+    pending: set[Future] = set()
+
+    def _fill() -> None:
+        # 在途块数有限，避免一次性提交全部任务
+        while len(pending) < 2 * pool.processes:
+            block = next(ranges, None)
+            if block is None:
+                return
+            pending.add(pool.executor.submit(run_chunk, job, *block, seed, streams))
 
+    def _check() -> None:
+        if not summary.stopped and stop is not None and stop(summary.losses[1], summary.decided):
+            summary.stopped = True
+            # 未开始的块取消，已在运行的块完成后计入
+            for future in pending:
+                future.cancel()
 
-def worker_process(seed, num_simulations):
-    gp = GameProcess(seed)
+    # 结果库中已有的对局可能已满足停止规则
+    _check()
+    if pool is not None and not summary.stopped:
+        _fill()
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if not future.cancelled():
+                start, count = future.result()
+                records = results.array[start:start + count]
+                summary.add(records)
+                if paired is not None:
+                    paired.add(records)
+                if save is not None:
+                    save(start, count)
+        if show_progress:
+            progress(summary, games)
 
-    results = []
-    for _ in range(num_simulations):
-        result = gp.simulate(0)
-        results.append(result)
+        _check()
+        if not summary.stopped:
+            _fill()
 
-    return np.array(results)
 
+def print_summary(
+        summary: Summary,
+        seed: int,
+        confidence: float = 0.95,
+        paired: Optional[Paired] = None,
+        cached: bool = False,
+) -> None:
+    print(f"\n时间 {summary.elapsed:.2f}")
+    print(f"种子: {seed}")
+    print(f"模拟次数: {summary.games}")
+    if cached:
+        print(f"结果库命中: {summary.cached}  新模拟: {summary.games - summary.cached}")
+    print(f"平局: {summary.draws}  平均回合: {summary.turns / max(summary.games, 1):.2f}")
+    print(f"平均值: {summary.mean:.4f}")
 
-def main():
-    num_processes = 10  # 并行进程数
-    num_simulations = 100  # 每个进程的模拟次数
+    low, high = summary.interval(confidence)
+    print(f"{confidence:.0%} 置信区间: [{low:.4f}, {high:.4f}]  宽度 {high - low:.4f}")
+    print(f"吞吐: {summary.rate:.1f} 局/秒")
+    if paired is not None:
+        for line in paired.report(confidence):
+            print(line)
 
-    pool = multiprocessing.Pool(processes=num_processes)
 
-    seeds = [random.randint(0, 100000) for _ in range(num_processes)]  # 种子
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--games', type=int, default=1000, help='总对局数')
+    parser.add_argument('-p', '--processes', type=int, default=0, help='工作进程数，0 表示 CPU 数')
+    parser.add_argument('-c', '--chunk', type=int, default=64, help='每次分发的对局数')
+    parser.add_argument('-s', '--seed', type=int, default=None, help='起始种子，默认随机')
+    parser.add_argument('-t', '--telemetry', default=None, help='逐局遥测分片目录，为空则不记录')
+    parser.add_argument('--confidence', type=float, default=0.95, help='置信水平')
+    parser.add_argument('--ci-width', type=float, default=None, help='胜率 Wilson 区间达到该宽度即停止')
+    parser.add_argument(
+        '--sprt', type=float, nargs=2, default=None, metavar=('P0', 'P1'),
+        help='SPRT 检验玩家 1 胜率 H0: p = P0 与 H1: p = P1，如 0.5 0.55',
+    )
+    parser.add_argument('--alpha', type=float, default=0.05, help='SPRT 第一类错误率')
+    parser.add_argument('--beta', type=float, default=0.05, help='SPRT 第二类错误率')
+    parser.add_argument('--config', default='config.toml', help='配置文件（变体 A）')
+    parser.add_argument('--variant', default=None, help='变体 B 的配置文件，与 A 以相同种子配对')
+    parser.add_argument('--swap', action='store_true', help='每个种子再以玩家 2 先手进行一局')
+    parser.add_argument('--db', default=None, help='SQLite 结果库，已有结果的种子不再模拟')
+    args = parser.parse_args()
 
-    func = partial(worker_process, num_simulations=num_simulations)
+    seed = random.randint(0, 100000) if args.seed is None else args.seed
 
-    start_time = time.time()
-    all_results = pool.map(func, seeds)
-    pool.close()
-    pool.join()
+    stop: Optional[StopRule] = None
+    if args.ci_width is not None and args.sprt is not None:
+        parser.error('--ci-width and --sprt are exclusive')
+    if args.ci_width is not None:
+        stop = WilsonWidth(args.ci_width, args.confidence)
+    elif args.sprt is not None:
+        stop = SPRT(*args.sprt, alpha=args.alpha, beta=args.beta)
 
-    print(f"\n时间 {time.time() - start_time:.2f}")
-    res = np.concatenate(all_results)
+    configs = (args.config,) if args.variant is None else (args.config, args.variant)
+    paired = Paired(len(configs)) if args.variant is not None or args.swap else None
 
-    mean = np.mean(res[:, 0][res[:, 0] > -1])
+    with ExitStack() as stack:
+        store = None if args.db is None else stack.enter_context(ResultStore(args.db))
+        # 记录遥测时 run 使用内部进程池，结束时写出分片
+        pool = None
+        if args.telemetry is None:
+            pool = stack.enter_context(WorkerPool(args.processes, configs))
+            for line in pool.report():
+                print(line)
+        summary = run(
+            args.games, seed, args.processes, args.chunk, args.telemetry,
+            stop=stop, configs=configs, swap=args.swap, paired=paired, pool=pool, store=store,
+        )
 
-    print(f"模拟次数: {len(res)}")
-    print(f"平均值: {mean:.4f}")
+    print_summary(summary, seed, args.confidence, paired, cached=args.db is not None)
+    if stop is not None:
+        state = '已满足' if summary.stopped else '未满足，已达对局上限'
+        print(f"停止规则 {state}: {stop.report()}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,157 @@
+"""
+胜率估计、流式矩估计与序贯停止规则
+
+停止规则在每块结果汇总后以 (成功数, 试验数) 调用，返回 True 时停止分发新对局
+"""
+import math
+from statistics import NormalDist
+from typing import Optional, Protocol
+
+import numpy as np
+
+
+def z_score(confidence: float) -> float:
+    """双侧置信水平对应的正态分位数"""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson(successes: float, trials: int, confidence: float = 0.95) -> tuple[float, float]:
+    """Wilson 得分区间，successes 可含半场（平局计 0.5），此时为得分率的区间"""
+    if trials == 0:
+        return 0.0, 1.0
+
+    z = z_score(confidence)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class Moments:
+    """流式均值与方差，按块合并（Chan 并行算法），不保留样本"""
+
+    def __init__(self) -> None:
+        self.n: int = 0
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+
+    def add(self, values: np.ndarray) -> None:
+        n = len(values)
+        if not n:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    @property
+    def var(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else float('nan')
+
+    @property
+    def se(self) -> float:
+        """均值的标准误"""
+        return math.sqrt(self.var / self.n) if self.n > 1 else float('nan')
+
+
+def bradley_terry(wins: np.ndarray, iterations: int = 1000, tol: float = 1e-10) -> np.ndarray:
+    """
+    Bradley-Terry 强度，MM 迭代（Hunter 2004）
+
+    :param wins: wins[i, j] 为 i 对 j 的胜场，平局可各计半场
+    :return: 几何平均为 1 的强度，i 胜 j 的概率为 p_i / (p_i + p_j)
+    """
+    games = wins + wins.T
+    total = wins.sum(axis=1)
+    # 全胜或全负的一方强度无有限解，各加半场虚拟对局保证收敛
+    prior = 0.5 * (games > 0)
+    games = games + 2 * prior
+    total = total + prior.sum(axis=1)
+
+    strength = np.ones(len(wins))
+    for _ in range(iterations):
+        denominator = (games / (strength[:, None] + strength[None, :])).sum(axis=1)
+        updated = np.where(denominator > 0, total / np.where(denominator > 0, denominator, 1), strength)
+        updated /= np.exp(np.log(updated).mean())
+        if np.abs(updated - strength).max() < tol:
+            return updated
+        strength = updated
+    return strength
+
+
+def elo(strength: np.ndarray, base: float = 1500) -> np.ndarray:
+    """Bradley-Terry 强度换算为 Elo 分，平均强度对应 base"""
+    return base + 400 * np.log10(strength)
+
+
+class StopRule(Protocol):
+    def __call__(self, successes: int, trials: int) -> bool:
+        ...
+
+    def report(self) -> str:
+        ...
+
+
+class WilsonWidth:
+    """Wilson 区间宽度不超过 width 时停止"""
+
+    def __init__(self, width: float, confidence: float = 0.95, min_trials: int = 100) -> None:
+        self.width: float = width
+        self.confidence: float = confidence
+        self.min_trials: int = min_trials
+
+    def __call__(self, successes: int, trials: int) -> bool:
+        if trials < self.min_trials:
+            return False
+        low, high = wilson(successes, trials, self.confidence)
+        return high - low <= self.width
+
+    def report(self) -> str:
+        return f'目标区间宽度 {self.width}'
+
+
+class SPRT:
+    """
+    Wald 序贯概率比检验，H0: p = p0，H1: p = p1
+
+    对数似然比越过上界接受 H1，越过下界接受 H0，
+    第一类、第二类错误率分别约为 alpha、beta
+    """
+
+    def __init__(self, p0: float, p1: float, alpha: float = 0.05, beta: float = 0.05) -> None:
+        if not 0 < p0 < 1 or not 0 < p1 < 1 or p0 == p1:
+            raise ValueError('invalid SPRT hypotheses')
+
+        self.p0: float = p0
+        self.p1: float = p1
+        self.upper: float = math.log((1 - beta) / alpha)
+        self.lower: float = math.log(beta / (1 - alpha))
+        self.llr: float = 0.0
+        self.decision: Optional[str] = None
+
+    def __call__(self, successes: int, trials: int) -> bool:
+        failures = trials - successes
+        self.llr = (
+            successes * math.log(self.p1 / self.p0) +
+            failures * math.log((1 - self.p1) / (1 - self.p0))
+        )
+        if self.llr >= self.upper:
+            self.decision = 'H1'
+        elif self.llr <= self.lower:
+            self.decision = 'H0'
+        else:
+            self.decision = None
+        return self.decision is not None
+
+    def report(self) -> str:
+        accepted = {
+            'H1': f'接受 H1 (p = {self.p1})',
+            'H0': f'接受 H0 (p = {self.p0})',
+            None: '未决',
+        }[self.decision]
+        return f'SPRT {accepted}  LLR {self.llr:.3f}  边界 [{self.lower:.3f}, {self.upper:.3f}]'
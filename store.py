@@ -0,0 +1,213 @@
+"""
+模拟结果库（SQLite）
+
+每局以 (配置哈希, 策略, 种子, 先手座位) 为键保存战败方与回合；
+配置哈希覆盖对阵双方的角色与其技能配置文件内容，未改动的对阵在修改其他角色后仍可复用
+
+用法：python store.py 结果库.sqlite [matchups | turns [配置哈希] | trend 对阵 [策略]]
+"""
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+import tomllib
+from typing import Iterable, Optional
+
+import numpy as np
+
+STORE_VERSION: int = 1
+"""对局规则或记录口径变化时递增，使旧结果不再命中"""
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS configs (
+    config_hash TEXT PRIMARY KEY,
+    matchup TEXT NOT NULL,
+    path TEXT NOT NULL,
+    detail TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    config_hash TEXT NOT NULL,
+    policy TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    first INTEGER NOT NULL,
+    loser INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    PRIMARY KEY (config_hash, policy, seed, first)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS configs_matchup ON configs (matchup, created_at);
+'''
+
+_WIN_RATE = 'SUM(g.loser = 1) * 1.0 / NULLIF(SUM(g.loser IN (0, 1)), 0)'
+"""玩家 1 胜率：玩家 2 战败的局数占分出胜负局数的比例，平局（loser = -1）不计"""
+
+
+def config_digest(path: str) -> tuple[str, str, dict]:
+    """
+    计算配置哈希
+
+    :return: (哈希, 对阵描述, 参与哈希的文件及其摘要)
+    """
+    with open(path, 'rb') as f:
+        loader = tomllib.load(f)['loader']
+
+    files: dict[str, str] = {}
+    for player in loader['players']:
+        for character in player['characters']:
+            paths = [f"{loader['character_config_path']}{character}.toml"] + [
+                f"{loader['skill_config_path']}{character}_{slot}.toml" for slot in (1, 2)
+            ]
+            for file in paths:
+                with open(file, 'rb') as f:
+                    files[file] = hashlib.sha256(f.read()).hexdigest()
+
+    # 只以文件名与内容计入，配置目录搬迁不影响哈希
+    detail = {
+        'version': STORE_VERSION,
+        'players': [[player['name'], list(player['characters'])] for player in loader['players']],
+        'files': {file.rsplit('/', 1)[-1]: digest for file, digest in sorted(files.items())},
+    }
+    digest = hashlib.sha256(json.dumps(detail, sort_keys=True).encode()).hexdigest()
+    matchup = ' vs '.join('+'.join(player['characters']) for player in loader['players'])
+    return digest, matchup, detail
+
+
+class ResultStore:
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.db: sqlite3.Connection = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        self.db.executescript(_SCHEMA)
+
+    def register(self, config: str) -> str:
+        """登记配置修订，返回其哈希"""
+        digest, matchup, detail = config_digest(config)
+        self.db.execute(
+            'INSERT OR IGNORE INTO configs VALUES (?, ?, ?, ?, ?)',
+            (digest, matchup, config, json.dumps(detail, ensure_ascii=False), time.time()),
+        )
+        self.db.commit()
+        return digest
+
+    def fill(
+            self,
+            array: np.ndarray,
+            hashes: list[str],
+            policy: str,
+            seed: int,
+    ) -> np.ndarray:
+        """
+        将已有结果写入按种子序号索引的结果数组（见 simulate.result_dtype）
+
+        :return: 每个种子是否在全部变体、座位下都已有结果
+        """
+        games = len(array)
+        seats = array.dtype['loser'].shape[1]
+        present = np.zeros(games, dtype=np.int32)
+        for v, digest in enumerate(hashes):
+            rows = self.db.execute(
+                'SELECT seed, first, loser, turns FROM games '
+                'WHERE config_hash = ? AND policy = ? AND seed >= ? AND seed < ? AND first < ?',
+                (digest, policy, seed, seed + games, seats),
+            ).fetchall()
+            if not rows:
+                continue
+            data = np.array(rows, dtype=np.int64)
+            index = data[:, 0] - seed
+            array['loser'][index, v, data[:, 1]] = data[:, 2]
+            array['turns'][index, v, data[:, 1]] = data[:, 3]
+            np.add.at(present, index, 1)
+        return present == len(hashes) * seats
+
+    def save(
+            self,
+            records: np.ndarray,
+            hashes: list[str],
+            policy: str,
+            seed: int,
+    ) -> None:
+        """保存结果数组中的一段，records 第 0 行对应种子 seed"""
+        rows: list[tuple] = []
+        loser = records['loser']
+        turns = records['turns']
+        for v, digest in enumerate(hashes):
+            for first in range(loser.shape[2]):
+                rows.extend(zip(
+                    [digest] * len(records),
+                    [policy] * len(records),
+                    range(seed, seed + len(records)),
+                    [first] * len(records),
+                    loser[:, v, first].tolist(),
+                    turns[:, v, first].tolist(),
+                ))
+        self.db.executemany('INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?)', rows)
+        self.db.commit()
+
+    def win_rate_by_matchup(self) -> list[tuple]:
+        """各对阵最新修订的 (对阵, 策略, 对局数, 平局数, 玩家 1 胜率, 平均回合)，胜率不计平局"""
+        return self.db.execute(f'''
+            SELECT c.matchup, g.policy, COUNT(*), SUM(g.loser = -1), {_WIN_RATE}, AVG(g.turns)
+            FROM games g JOIN configs c USING (config_hash)
+            WHERE c.created_at = (SELECT MAX(created_at) FROM configs WHERE matchup = c.matchup)
+            GROUP BY c.matchup, g.policy
+            ORDER BY c.matchup, g.policy
+        ''').fetchall()
+
+    def turn_distribution(self, config_hash: Optional[str] = None) -> list[tuple[int, int]]:
+        """(回合, 对局数)，可限定配置修订"""
+        where, args = ('WHERE config_hash = ?', (config_hash,)) if config_hash else ('', ())
+        return self.db.execute(
+            f'SELECT turns, COUNT(*) FROM games {where} GROUP BY turns ORDER BY turns',
+            args,
+        ).fetchall()
+
+    def trend(self, matchup: str, policy: str = 'random') -> list[tuple]:
+        """同一对阵各配置修订的 (哈希, 登记时间, 对局数, 平局数, 玩家 1 胜率)，按登记时间排列，胜率不计平局"""
+        return self.db.execute(f'''
+            SELECT c.config_hash, c.created_at, COUNT(g.seed), TOTAL(g.loser = -1), {_WIN_RATE}
+            FROM configs c LEFT JOIN games g ON g.config_hash = c.config_hash AND g.policy = ?
+            WHERE c.matchup = ?
+            GROUP BY c.config_hash
+            ORDER BY c.created_at
+        ''', (policy, matchup)).fetchall()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> 'ResultStore':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def _print_rows(header: Iterable[str], rows: list[tuple]) -> None:
+    print('\t'.join(header))
+    for row in rows:
+        print('\t'.join(f'{value:.4f}' if isinstance(value, float) else str(value) for value in row))
+
+
+def main(argv: list[str]) -> None:
+    if not argv:
+        raise SystemExit(__doc__)
+
+    with ResultStore(argv[0]) as store:
+        command = argv[1] if len(argv) > 1 else 'matchups'
+        if command == 'matchups':
+            _print_rows(('对阵', '策略', '对局数', '平局数', '玩家 1 胜率', '平均回合'), store.win_rate_by_matchup())
+        elif command == 'turns':
+            _print_rows(('回合', '对局数'), store.turn_distribution(argv[2] if len(argv) > 2 else None))
+        elif command == 'trend':
+            rows = [
+                (digest[:12], time.strftime('%Y-%m-%d %H:%M', time.localtime(created)), games, int(draws), rate)
+                for digest, created, games, draws, rate in store.trend(*argv[2:4])
+            ]
+            _print_rows(('配置哈希', '登记时间', '对局数', '平局数', '玩家 1 胜率'), rows)
+        else:
+            raise SystemExit(f'unknown command {command}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,196 @@
+"""
+逐局遥测
+
+每局一条定长记录，写入结构化数组缓冲，满 chunk 条后整块写出为 .npy 分片，
+内存占用与总局数无关；读取时各分片以内存映射打开
+
+记录字段：
+    seed      本局随机种子，未指定为 -1
+    first     先手座位
+    winner    胜方座位，平局为 -1
+    turns     结束回合
+    damage    各座位角色承受的伤害总和
+    skills    各角色使用技能次数，角色按座位、uuid 排列
+    statuses  各状态名被施加次数，顺序同 env.STATUS_NAMES
+"""
+import glob
+import os
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+
+from Core.entity import CharacterID, SkillID
+from Core.managers.signals import ArgAddStatus
+from env import STATUS_NAMES
+
+
+STATUS_INDEX: dict[str, int] = {name: i for i, name in enumerate(STATUS_NAMES)}
+
+
+def record_dtype(characters: int) -> np.dtype:
+    return np.dtype([
+        ('seed', np.int64),
+        ('first', np.int8),
+        ('winner', np.int8),
+        ('turns', np.int16),
+        ('damage', np.int64, (2,)),
+        ('skills', np.uint16, (characters,)),
+        ('statuses', np.uint16, (len(STATUS_NAMES),)),
+    ])
+
+
+class Telemetry:
+    """
+    挂载到 GameProcess.telemetry 后，reset 时开始记录，simulate 结束时写入一条记录
+
+    用法：
+        gp.telemetry = Telemetry('telemetry/')
+        for i in range(n):
+            gp.simulate(0, seed=i)
+        gp.telemetry.close()
+    """
+
+    def __init__(self, directory: str, chunk: int = 65536, prefix: Optional[str] = None) -> None:
+        """
+        :param directory: 分片目录
+        :param chunk: 每个分片的记录数
+        :param prefix: 分片文件名前缀，默认由进程号与启动时间构成，多进程写同一目录互不冲突
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory: str = directory
+        self.chunk: int = chunk
+        self.prefix: str = f'{os.getpid()}-{time.time_ns()}' if prefix is None else prefix
+        self.shards: int = 0
+
+        self.buffer: Optional[np.ndarray] = None
+        self.size: int = 0
+
+        self._gs = None
+        self._hp: dict[CharacterID, int] = {}
+        self._seat: dict[CharacterID, int] = {}
+        self._column: dict[CharacterID, int] = {}
+        self._caster: dict[SkillID, int] = {}
+
+        self.seed: int = -1
+        self.damage: list[int] = [0, 0]
+        self.skills: list[int] = []
+        self.statuses: list[int] = [0] * len(STATUS_NAMES)
+
+    def begin(self, gp, seed: Optional[int] = None) -> None:
+        """
+        对局重置后调用，建立角色列映射并监听状态信号
+
+        伤害由 hp 的持久化值监听统计（hp 降幅即实际伤害），不必为伤害信号构造参数
+        """
+        gs = gp.gs
+        if gs is not self._gs:
+            self._unwatch()
+            self._gs = gs
+            gs.attributes.characters.hp.watch(self._on_hp)
+        relations = gs.relations
+        hp = gs.attributes.characters.hp
+
+        self._hp.clear()
+        self._seat.clear()
+        self._column.clear()
+        self._caster.clear()
+        for seat, player in enumerate(relations.players.get_item_list()):
+            for character in sorted(relations.characters.get_children(player), key=lambda c: c.uuid):
+                self._seat[character] = seat
+                self._hp[character] = hp.current(character)
+                self._column[character] = len(self._column)
+                for skill in relations.skills.get_children(character):
+                    self._caster[skill] = self._column[character]
+
+        if self.buffer is None:
+            self.buffer = np.zeros(self.chunk, dtype=record_dtype(len(self._column)))
+        elif self.buffer.dtype['skills'].shape[0] != len(self._column):
+            raise RuntimeError('character count changed between games')
+
+        self.seed = -1 if seed is None else seed
+        self.damage = [0, 0]
+        self.skills = [0] * len(self._column)
+        self.statuses = [0] * len(STATUS_NAMES)
+
+        gs.signal_bus.connect(gs.signals.add_status, self._on_add_status)
+
+    def _on_hp(self, character: CharacterID, value: int) -> None:
+        last = self._hp.get(character)
+        if last is None:
+            return
+        if value < last:
+            self.damage[self._seat[character]] += last - value
+        self._hp[character] = value
+
+    def _unwatch(self) -> None:
+        if self._gs is not None:
+            self._gs.attributes.characters.hp.watchers.remove(self._on_hp)
+            self._gs = None
+
+    def _on_add_status(self, arg: ArgAddStatus) -> None:
+        for key, value in self._gs.tags.statuses.item_to_tags.get(arg.status, ()):
+            if key == 'name' and value in STATUS_INDEX:
+                self.statuses[STATUS_INDEX[value]] += 1
+
+    def skill(self, skill: SkillID) -> None:
+        self.skills[self._caster[skill]] += 1
+
+    def end(self, first: int, loser: int, turns: int) -> None:
+        """写入本局记录，缓冲满时写出分片"""
+        self.buffer[self.size] = (
+            self.seed,
+            first,
+            1 - loser if loser in (0, 1) else -1,
+            turns,
+            self.damage,
+            self.skills,
+            self.statuses,
+        )
+        self.size += 1
+        if self.size == self.chunk:
+            self.flush()
+
+    def flush(self) -> None:
+        """写出缓冲中的记录，先写临时文件再原子替换，读取方不会看到残缺分片"""
+        if not self.size:
+            return
+
+        path = os.path.join(self.directory, f'{self.prefix}-{self.shards:06d}.npy')
+        temp = f'{path}.tmp'
+        with open(temp, 'wb') as f:
+            np.save(f, self.buffer[:self.size])
+        os.replace(temp, path)
+
+        self.shards += 1
+        self.size = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._unwatch()
+        self._hp.clear()
+
+
+class TelemetryReader:
+    """以内存映射打开目录下全部分片"""
+
+    def __init__(self, directory: str) -> None:
+        self.paths: list[str] = sorted(glob.glob(os.path.join(directory, '*.npy')))
+        self.shards: list[np.ndarray] = [np.load(path, mmap_mode='r') for path in self.paths]
+
+        dtypes = {shard.dtype for shard in self.shards}
+        if len(dtypes) > 1:
+            raise RuntimeError(f'mixed record layouts in {directory}')
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        """逐分片迭代，适合对超出内存的数据做流式统计"""
+        return iter(self.shards)
+
+    def column(self, name: str) -> np.ndarray:
+        """拼接单个字段，仅复制该字段"""
+        if not self.shards:
+            return np.empty(0)
+        return np.concatenate([shard[name] for shard in self.shards])
@@ -0,0 +1,51 @@
+from Core.rxsys.rxpers import brxpers_once
+
+from main import GameProcess
+
+
+def _game(seed: int = 1) -> GameProcess:
+    gp = GameProcess()
+    gp.loader.file_reload = False
+    gp.reset(seed)
+    return gp
+
+
+def _first_usable(gp: GameProcess):
+    player = gp.gs.relations.players.get_item_list()[0]
+    skills = gp.gs.get_usable_skills(player)
+    assert skills
+    return player, skills[0]
+
+
+def test_once_usable_modifier_is_reflected():
+    gp = _game()
+    gs = gp.gs
+    player, skill = _first_usable(gp)
+    usable = gs.attributes.skills.usable
+
+    brxpers_once(usable, False, skill)
+    assert skill not in gs.get_usable_skills(player)
+    assert not gs.get_allowed_skills()[player.uuid][gs.relations.skills.get_parent(skill).uuid][skill.uuid]
+    assert not usable.current(skill)
+
+    # 一次性修改已被消耗并持久化，之后的读取保持不变
+    assert skill not in gs.get_usable_skills(player)
+
+
+def test_conditional_usable_modifier_follows_condition():
+    gp = _game()
+    gs = gp.gs
+    player, skill = _first_usable(gp)
+    usable = gs.attributes.skills.usable
+    silenced = [True]
+
+    def _silence(arg):
+        arg.append(not silenced[0])
+
+    usable.add(callback=_silence, check=lambda arg: arg.target == skill, times=-1)
+    assert skill not in gs.get_usable_skills(player)
+    assert not gs.actions.is_usable(skill)
+
+    silenced[0] = False
+    assert skill in gs.get_usable_skills(player)
+    assert gs.actions.is_usable(skill)
@@ -0,0 +1,99 @@
+from Core.entity import CharacterID
+from Core.signal import Slot
+
+from main import GameProcess
+
+
+def _game(seed: int = 1) -> GameProcess:
+    gp = GameProcess()
+    gp.loader.file_reload = False
+    gp.reset(seed)
+    return gp
+
+
+def _sides(gp: GameProcess) -> tuple[CharacterID, list[CharacterID]]:
+    relations = gp.gs.relations
+    players = relations.players.get_item_list()
+    source = sorted(relations.characters.get_children(players[0]), key=lambda c: c.uuid)[0]
+    targets = sorted(relations.characters.get_children(players[1]), key=lambda c: c.uuid)
+    return source, targets
+
+
+def _listen(gs, signal, callback) -> None:
+    gs.signal_bus.connect_slot(signal=signal, slot=Slot(callback=callback, times=-1))
+
+
+def test_legacy_and_batch_listeners_together():
+    gp = _game()
+    gs = gp.gs
+    source, targets = _sides(gp)
+    hps = [gs.attributes.characters.hp.current(target) for target in targets]
+    events = []
+
+    def _record(name):
+        return lambda arg: events.append((name, getattr(arg, 'target', None)))
+
+    def _pre_damage(arg):
+        events.append(('pre_damage', arg.target))
+        arg.damage += 1
+
+    def _batch_pre_damage(arg):
+        events.append(('batch_pre_damage', None))
+        arg.damages = [damage + 2 for damage in arg.damages]
+
+    _listen(gs, gs.signals.damage_collect, _record('damage_collect'))
+    _listen(gs, gs.signals.batch_damage_collect, _record('batch_damage_collect'))
+    _listen(gs, gs.signals.pre_damage, _pre_damage)
+    _listen(gs, gs.signals.batch_pre_damage, _batch_pre_damage)
+    _listen(gs, gs.signals.damage, _record('damage'))
+    _listen(gs, gs.signals.batch_damage, _record('batch_damage'))
+
+    attack = gs.attributes.characters.attack.request(source)
+    true_damages = gs.take_damage_characters([(target, 0) for target in targets], source, 'common')
+
+    per_target = lambda name: [(name, target) for target in targets]
+    assert events == (
+        per_target('damage_collect') + [('batch_damage_collect', None)] +
+        per_target('pre_damage') + [('batch_pre_damage', None)] +
+        per_target('damage') + [('batch_damage', None)]
+    )
+    for target, hp, true_damage in zip(targets, hps, true_damages):
+        defense = gs.attributes.characters.defense.request(target)
+        expected = min(max(attack - defense, 0) + 3, hp)
+        assert true_damage == expected
+        assert gs.attributes.characters.hp.current(target) == hp - expected
+
+
+def test_single_target_batch_matches_take_damage_character():
+    results = []
+    for batched in (False, True):
+        gp = _game(7)
+        gs = gp.gs
+        source, targets = _sides(gp)
+        _listen(gs, gs.signals.pre_damage, lambda arg: setattr(arg, 'damage', arg.damage * 2))
+        if batched:
+            damage = gs.take_damage_characters([(targets[0], 1)], source, 'common')[0]
+        else:
+            damage = gs.take_damage_character(1, targets[0], source, 'common')
+        results.append((damage, gs.attributes.characters.hp.current(targets[0])))
+    assert results[0] == results[1]
+
+
+def test_modify_hps_matches_sequential_modify_hp():
+    deltas = None
+    results = []
+    for batched in (False, True):
+        gp = _game()
+        attr = gp.gs.attributes.characters
+        _, targets = _sides(gp)
+        target = targets[0]
+        max_hp = attr.max_hp.current(target)
+        # 先治疗（被上限截断）再伤害，逐条截断与合并后截断结果不同
+        deltas = [(target, max_hp), (target, -3), (targets[1], -2), (target, 1)]
+        if batched:
+            changes = attr.modify_hps(deltas)
+        else:
+            changes = [attr.modify_hp(delta, character) for character, delta in deltas]
+        results.append((changes, [attr.hp.current(character) for character in targets]))
+    assert results[0] == results[1]
+    assert results[1][0][1] == -3
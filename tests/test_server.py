@@ -0,0 +1,42 @@
+import random
+
+from main import GameProcess
+from server import MatchPool
+
+
+def _play(checkpoint_every: int, commands: int = 60, seed: int = 3) -> list:
+    """两局交替执行随机命令，每条命令后都切换对局，记录每步导出的局面"""
+    gp = GameProcess()
+    gp.loader.file_reload = False
+    pool = MatchPool(gp, checkpoint_every=checkpoint_every)
+    matches = [pool.create(seed=seed), pool.create(seed=seed + 1)]
+    rng = random.Random(seed)
+    states = []
+    for step in range(commands):
+        match = matches[step % 2]
+        if step % 7 == 6:
+            pool.execute(match, 'process', None)
+        else:
+            allowed = pool.execute(match, 'get_allowed_skills', None)
+            skills = [
+                skill
+                for characters in allowed.values()
+                for skills in characters.values()
+                for skill, usable in skills.items()
+                if usable
+            ]
+            if skills:
+                skill = rng.choice(sorted(skills))
+                need = pool.execute(match, 'get_need_selections', {'skillid': skill})
+                selections = [rng.sample(sorted(characters), k=num) if characters else [] for num, characters in need]
+                try:
+                    pool.execute(match, 'run_container', {'containerid': skill, 'selections': selections})
+                except Exception:
+                    pass
+        states.append(pool.execute(match, 'get_dict', None))
+    pool.close()
+    return states
+
+
+def test_checkpoints_match_full_replay():
+    assert _play(checkpoint_every=3) == _play(checkpoint_every=0)
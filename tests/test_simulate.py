@@ -0,0 +1,12 @@
+import random
+
+from main import GameProcess
+
+
+def test_seeded_simulate_reproduces_with_random_first_player():
+    gp = GameProcess()
+    first = [gp.simulate(seed=seed) for seed in range(8)]
+    random.seed(12345)
+    gp.simulate()
+    second = [gp.simulate(seed=seed) for seed in reversed(range(8))][::-1]
+    assert first == second
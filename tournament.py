@@ -0,0 +1,247 @@
+"""
+全对阵循环赛
+
+从角色配置目录枚举指定人数的队伍，两两对阵，每个种子双方各执玩家 1（先手）一次；
+父进程一次性解析验证全部配置后分叉工作进程，对局中不再读取或解析配置，
+各队伍的注册步骤与编译的容器在工作进程内按队伍缓存，对阵由双方组合复用
+
+输出得分率矩阵（平局计半场，含同一口径的 Wilson 区间）与 Bradley-Terry / Elo 评分
+
+用法：python tournament.py [-k 队伍人数] [-g 每种对阵的种子数] [--characters a b ...] [--sample 队伍数] [-o 结果.npz]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Optional
+
+import numpy as np
+
+from Core.loader import SKILL_FILE
+from main import GameProcess
+from simulate import WorkerPool
+from stats import bradley_terry, elo, wilson
+
+_gp: Optional[GameProcess] = None
+"""父进程构建并预加载全部配置，工作进程分叉后直接继承"""
+
+
+def prepare(config: str = 'config.toml', workers: int = 0) -> GameProcess:
+    global _gp
+    _gp = GameProcess(config=config)
+    _gp.loader.file_reload = False
+    _gp.loader.preload(workers)
+    return _gp
+
+
+def characters(gp: GameProcess) -> list[str]:
+    """配置目录中技能齐全的角色"""
+    loader = gp.loader
+    slots: dict[str, set[int]] = {}
+    for file in os.listdir(loader.skill_config_path):
+        match = SKILL_FILE.match(file)
+        if match:
+            slots.setdefault(match['character'], set()).add(int(match['slot']))
+    return sorted(
+        file[:-5]
+        for file in os.listdir(loader.character_config_path)
+        if file.endswith('.toml') and {1, 2} <= slots.get(file[:-5], set())
+    )
+
+
+def play_matchup(
+        i: int,
+        j: int,
+        team_a: tuple[str, ...],
+        team_b: tuple[str, ...],
+        seed: int,
+        games: int,
+        streams: bool = False,
+) -> tuple[int, int, int, int, int]:
+    """
+    每个种子 A、B 各执玩家 1 一局
+
+    :param streams: 每个决策点单独设种（见 GameProcess.simulate），
+        不同配置下同一种子的对局逐步使用相同的随机数
+    :return: (i, j, A 胜场, B 胜场, 平局)
+    """
+    loader = _gp.loader
+    names = [player['name'] for player in loader.players]
+    wins = [0, 0]
+    draws = 0
+    for seating, (first, second) in enumerate(((team_a, team_b), (team_b, team_a))):
+        loader.use_players([
+            {'name': names[0], 'characters': list(first)},
+            {'name': names[1], 'characters': list(second)},
+        ])
+        for g in range(games):
+            loser, _ = _gp.simulate(0, seed=seed + g, streams=streams)
+            if loser == -1:
+                draws += 1
+            else:
+                # seating 0 时 A 为玩家索引 0
+                wins[(1 - loser) ^ seating] += 1
+    return i, j, wins[0], wins[1], draws
+
+
+class Tournament:
+    def __init__(self, teams: list[tuple[str, ...]]) -> None:
+        self.teams: list[tuple[str, ...]] = teams
+        n = len(teams)
+        self.wins: np.ndarray = np.zeros((n, n), dtype=np.int64)
+        """wins[i, j] 为 i 对 j 的胜场"""
+        self.draws: np.ndarray = np.zeros((n, n), dtype=np.int64)
+
+    def add(self, i: int, j: int, wins_a: int, wins_b: int, draws: int) -> None:
+        self.wins[i, j] += wins_a
+        self.wins[j, i] += wins_b
+        self.draws[i, j] += draws
+        self.draws[j, i] += draws
+
+    @property
+    def games(self) -> np.ndarray:
+        return self.wins + self.wins.T + self.draws
+
+    def rate(self) -> np.ndarray:
+        """得分率矩阵，平局计半场，未对阵为 nan"""
+        games = self.games
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(games > 0, (self.wins + 0.5 * self.draws) / games, np.nan)
+
+    def intervals(self, confidence: float = 0.95) -> tuple[np.ndarray, np.ndarray]:
+        """得分率（与 rate 相同，平局计半场）的 Wilson 区间"""
+        n = len(self.teams)
+        games = self.games
+        low = np.full((n, n), np.nan)
+        high = np.full((n, n), np.nan)
+        for i, j in itertools.permutations(range(n), 2):
+            if games[i, j]:
+                score = self.wins[i, j] + 0.5 * self.draws[i, j]
+                low[i, j], high[i, j] = wilson(float(score), int(games[i, j]), confidence)
+        return low, high
+
+    def ratings(self) -> tuple[np.ndarray, np.ndarray]:
+        """(Bradley-Terry 强度, Elo 分)，平局各计半场"""
+        strength = bradley_terry(self.wins + 0.5 * self.draws)
+        return strength, elo(strength)
+
+    def save(self, path: str, confidence: float = 0.95) -> None:
+        low, high = self.intervals(confidence)
+        strength, ratings = self.ratings()
+        np.savez(
+            path,
+            teams=np.array(['+'.join(team) for team in self.teams]),
+            wins=self.wins,
+            draws=self.draws,
+            rate=self.rate(),
+            low=low,
+            high=high,
+            strength=strength,
+            elo=ratings,
+        )
+
+
+def run(
+        tournament: Tournament,
+        pool: WorkerPool,
+        games: int,
+        seed: int,
+        show_progress: bool = True,
+) -> float:
+    """调度全部对阵，返回耗时（秒）"""
+    pairs = itertools.combinations(range(len(tournament.teams)), 2)
+    total = len(tournament.teams) * (len(tournament.teams) - 1) // 2
+    pending: set[Future] = set()
+    done_pairs = 0
+    start = time.perf_counter()
+
+    def _fill() -> None:
+        # 在途任务有限，对阵很多时不一次性提交
+        for i, j in itertools.islice(pairs, max(2 * pool.processes - len(pending), 0)):
+            teams = tournament.teams
+            pending.add(pool.executor.submit(play_matchup, i, j, teams[i], teams[j], seed, games))
+
+    _fill()
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            tournament.add(*future.result())
+            done_pairs += 1
+        if show_progress:
+            elapsed = time.perf_counter() - start
+            print(
+                f'\r对阵 {done_pairs}/{total}  {done_pairs * games * 2 / elapsed:.1f} 局/秒',
+                end='',
+                file=sys.stderr,
+                flush=True,
+            )
+        _fill()
+
+    if show_progress:
+        print(file=sys.stderr)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', default='config.toml', help='配置文件，提供配置目录与玩家名')
+    parser.add_argument('-k', '--size', type=int, default=None, help='队伍人数，默认同配置中玩家 1')
+    parser.add_argument('-g', '--games', type=int, default=50, help='每种对阵的种子数，每个种子双方各先手一局')
+    parser.add_argument('-p', '--processes', type=int, default=0, help='工作进程数，0 表示 CPU 数')
+    parser.add_argument('-s', '--seed', type=int, default=None, help='起始种子，默认随机')
+    parser.add_argument('--characters', nargs='+', default=None, help='参与组队的角色，默认全部')
+    parser.add_argument('--sample', type=int, default=None, help='随机抽取的队伍数，默认全部组合')
+    parser.add_argument('--top', type=int, default=20, help='打印评分前若干队伍')
+    parser.add_argument('-o', '--output', default=None, help='保存完整矩阵与评分的 .npz 文件')
+    args = parser.parse_args()
+
+    seed = random.randint(0, 100000) if args.seed is None else args.seed
+
+    start = time.perf_counter()
+    gp = prepare(args.config)
+    pool_names = characters(gp) if args.characters is None else args.characters
+    size = len(gp.loader.players[0]['characters']) if args.size is None else args.size
+    teams = list(itertools.combinations(pool_names, size))
+    if args.sample is not None and args.sample < len(teams):
+        teams = sorted(random.Random(seed).sample(teams, args.sample))
+    if len(teams) < 2:
+        parser.error('need at least two teams')
+    print(f'角色: {len(pool_names)}  队伍: {len(teams)}  对阵: {len(teams) * (len(teams) - 1) // 2}')
+    print(f'配置预加载: {(time.perf_counter() - start) * 1e3:.0f} ms')
+
+    tournament = Tournament(teams)
+    with WorkerPool(args.processes, configs=()) as pool:
+        for line in pool.report():
+            print(line)
+        elapsed = run(tournament, pool, args.games, seed)
+
+    total = int(tournament.games.sum()) // 2
+    print(f'\n时间 {elapsed:.2f}  种子: {seed}  对局: {total}  吞吐: {total / elapsed:.1f} 局/秒')
+
+    strength, ratings = tournament.ratings()
+    rate = tournament.rate()
+    order = np.argsort(-strength)
+    print(f'\n{"队伍":<24}{"Elo":>8}{"BT":>8}{"平均得分":>10}')
+    for i in order[:args.top]:
+        print(f'{"+".join(teams[i]):<24}{ratings[i]:>8.0f}{strength[i]:>8.3f}{np.nanmean(rate[i]):>10.3f}')
+
+    if len(teams) <= 12:
+        low, high = tournament.intervals()
+        print('\n得分率矩阵（行对列，平局计半场，95% Wilson 区间）')
+        for i in order:
+            cells = [
+                '-' if i == j else f'{rate[i, j]:.2f}[{low[i, j]:.2f},{high[i, j]:.2f}]'
+                for j in order
+            ]
+            print(f'{"+".join(teams[i]):<24}' + ' '.join(f'{cell:>17}' for cell in cells))
+
+    if args.output:
+        tournament.save(args.output)
+        print(f'\n已保存 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
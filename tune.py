@@ -0,0 +1,334 @@
+"""
+平衡参数搜索
+
+在给定参数范围内随机生成配置变体（以 GameLoader.overrides 在内存中覆盖，不写 TOML），
+以逐级减半（successive halving）分配模拟预算：每轮只保留偏差最小的 1/eta，
+存活者的种子数乘以 eta，明显失衡的变体只消耗少量对局；--hyperband 以不同的
+变体数与起始种子数组合运行多组逐级减半
+
+目标为各对阵中 A 方得分率（平局计半场，双方各先手一次）接近 target，
+变体的偏差取各对阵偏差的最大值；所有变体使用相同种子，并对每个决策点单独设种（公共随机数），
+某一步随机数用量不同不会错开后续决策，比较时噪声部分抵消；--no-streams 时只在对局开始时设种
+
+参数写法：文件名:键路径=下限:上限（整数，含两端），如
+    test1:attack=5:9
+    test1_1:container.effect_config.0.value=2:6
+
+用法：python tune.py --param ... [--matchup A1+A2 B1+B2] [-n 变体数] [--min-seeds 种子数] [--eta 3] [--no-streams] [-o best.json]
+"""
+import argparse
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Iterator
+
+import numpy as np
+
+import tournament
+from simulate import WorkerPool
+from stats import wilson
+
+
+class Parameter:
+    def __init__(self, spec: str) -> None:
+        """:param spec: 文件名:键路径=下限:上限"""
+        try:
+            address, bounds = spec.split('=')
+            self.stem, self.key = address.split(':')
+            low, high = bounds.split(':')
+            self.low: int = int(low)
+            self.high: int = int(high)
+        except ValueError:
+            raise ValueError(f'invalid parameter {spec!r}, expected file:key.path=low:high') from None
+        if self.low > self.high:
+            raise ValueError(f'empty range in {spec!r}')
+
+    @property
+    def size(self) -> int:
+        return self.high - self.low + 1
+
+    def __str__(self) -> str:
+        return f'{self.stem}:{self.key}'
+
+
+def sample_variants(parameters: list[Parameter], count: int, rng: random.Random) -> list[dict[str, dict[str, Any]]]:
+    """不重复地抽取 count 个取值组合，组合总数不足时全部枚举"""
+    space = math.prod(parameter.size for parameter in parameters)
+    if space <= count:
+        combinations = list(itertools.product(*(range(p.low, p.high + 1) for p in parameters)))
+    else:
+        chosen: set[tuple[int, ...]] = set()
+        while len(chosen) < count:
+            chosen.add(tuple(rng.randint(p.low, p.high) for p in parameters))
+        combinations = sorted(chosen)
+
+    variants = []
+    for values in combinations:
+        overrides: dict[str, dict[str, Any]] = {}
+        for parameter, value in zip(parameters, values):
+            overrides.setdefault(parameter.stem, {})[parameter.key] = value
+        variants.append(overrides)
+    return variants
+
+
+def evaluate(
+        index: int,
+        overrides: dict[str, dict[str, Any]],
+        matchup: int,
+        team_a: tuple[str, ...],
+        team_b: tuple[str, ...],
+        seed: int,
+        games: int,
+        streams: bool = True,
+) -> tuple[int, int, int, int, int]:
+    """
+    在工作进程中以变体配置运行一段种子，每个种子双方各先手一局
+
+    :return: (变体序号, 对阵序号, A 胜场, B 胜场, 平局)
+    """
+    tournament._gp.loader.use_overrides(overrides)
+    _, _, wins_a, wins_b, draws = tournament.play_matchup(0, 0, team_a, team_b, seed, games, streams)
+    return index, matchup, wins_a, wins_b, draws
+
+
+class Variant:
+    def __init__(self, overrides: dict[str, dict[str, Any]], matchups: int) -> None:
+        self.overrides: dict[str, dict[str, Any]] = overrides
+        self.results: np.ndarray = np.zeros((matchups, 3), dtype=np.int64)
+        """各对阵的 (A 胜场, B 胜场, 平局)"""
+        self.seeds: int = 0
+
+    def rates(self) -> np.ndarray:
+        """各对阵中 A 方得分率"""
+        wins_a, wins_b, draws = self.results.T
+        games = np.maximum(wins_a + wins_b + draws, 1)
+        return (wins_a + 0.5 * draws) / games
+
+    def loss(self, target: float) -> float:
+        """各对阵得分率与目标偏差的最大值"""
+        return float(np.abs(self.rates() - target).max())
+
+    def intervals(self, confidence: float = 0.95) -> list[tuple[float, float]]:
+        """各对阵中 A 方得分率（同 rates，平局计半场）的 Wilson 区间"""
+        return [wilson(float(a + 0.5 * d), int(a + b + d), confidence) for a, b, d in self.results]
+
+    def describe(self) -> str:
+        if not self.overrides:
+            return '（基线）'
+        return ' '.join(
+            f'{stem}:{key}={value}'
+            for stem, values in sorted(self.overrides.items())
+            for key, value in sorted(values.items())
+        )
+
+
+class Search:
+    def __init__(
+            self,
+            pool: WorkerPool,
+            matchups: list[tuple[tuple[str, ...], tuple[str, ...]]],
+            seed: int,
+            target: float = 0.5,
+            chunk: int = 16,
+            show_progress: bool = True,
+            streams: bool = True,
+    ) -> None:
+        """
+        :param chunk: 每个任务的种子数，多个工作进程可同时推进同一变体
+        :param streams: 每个决策点单独设种，使各变体在同一种子下逐步共享随机数
+        """
+        self.pool: WorkerPool = pool
+        self.matchups: list[tuple[tuple[str, ...], tuple[str, ...]]] = matchups
+        self.seed: int = seed
+        self.target: float = target
+        self.chunk: int = chunk
+        self.show_progress: bool = show_progress
+        self.streams: bool = streams
+        self.games: int = 0
+        """已运行的对局数"""
+        self.start: float = time.perf_counter()
+
+    def _tasks(self, variants: list[Variant], seeds: int) -> Iterator[tuple]:
+        for index, variant in enumerate(variants):
+            for start in range(variant.seeds, seeds, self.chunk):
+                count = min(self.chunk, seeds - start)
+                for matchup, (team_a, team_b) in enumerate(self.matchups):
+                    yield index, variant.overrides, matchup, team_a, team_b, self.seed + start, count, self.streams
+
+    def extend(self, variants: list[Variant], seeds: int) -> None:
+        """把各变体补足到 seeds 个种子，已运行的种子不重复运行"""
+        tasks = self._tasks(variants, seeds)
+        pending: set[Future] = set()
+
+        def _fill() -> None:
+            for task in itertools.islice(tasks, max(2 * self.pool.processes - len(pending), 0)):
+                pending.add(self.pool.executor.submit(evaluate, *task))
+
+        _fill()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, matchup, wins_a, wins_b, draws = future.result()
+                variants[index].results[matchup] += (wins_a, wins_b, draws)
+                self.games += wins_a + wins_b + draws
+            if self.show_progress:
+                elapsed = time.perf_counter() - self.start
+                print(f'\r对局 {self.games}  {self.games / elapsed:.1f} 局/秒', end='', file=sys.stderr, flush=True)
+            _fill()
+        for variant in variants:
+            variant.seeds = max(variant.seeds, seeds)
+
+    def successive_halving(self, variants: list[Variant], min_seeds: int, eta: int, rungs: int) -> list[Variant]:
+        """
+        逐级减半
+
+        :return: 最后一级的存活者，按偏差排列
+        """
+        alive = list(variants)
+        seeds = min_seeds
+        for rung in range(rungs):
+            self.extend(alive, seeds)
+            alive.sort(key=lambda variant: variant.loss(self.target))
+            if self.show_progress:
+                print(
+                    f'\n第 {rung + 1} 级: {len(alive)} 个变体 × {seeds} 种子  '
+                    f'最小偏差 {alive[0].loss(self.target):.4f}',
+                    file=sys.stderr,
+                )
+            if rung < rungs - 1:
+                alive = alive[:max(1, len(alive) // eta)]
+                seeds *= eta
+        return alive
+
+    def hyperband(
+            self,
+            sample: Callable[[int], list[Variant]],
+            min_seeds: int,
+            max_seeds: int,
+            eta: int,
+    ) -> list[Variant]:
+        """
+        Hyperband：各组以不同的 (变体数, 起始种子数) 运行逐级减半，最后一级均为 max_seeds
+
+        :param sample: 生成指定数量的新变体
+        :return: 各组的最终存活者，按偏差排列
+        """
+        levels = int(math.log(max_seeds / min_seeds, eta) + 1e-9)
+        finalists: list[Variant] = []
+        for s in range(levels, -1, -1):
+            count = math.ceil((levels + 1) / (s + 1) * eta ** s)
+            seeds = max_seeds // eta ** s
+            if self.show_progress:
+                print(f'\n组 s={s}: {count} 个变体，起始 {seeds} 种子', file=sys.stderr)
+            finalists += self.successive_halving(sample(count), seeds, eta, s + 1)
+        return sorted(finalists, key=lambda variant: variant.loss(self.target))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', default='config.toml', help='基准配置文件')
+    parser.add_argument('--param', action='append', required=True, help='文件名:键路径=下限:上限，可重复')
+    parser.add_argument(
+        '--matchup', action='append', nargs=2, default=None, metavar=('A', 'B'),
+        help='对阵，队伍以 + 连接角色名，可重复；默认为配置中的对阵',
+    )
+    parser.add_argument('--target', type=float, default=0.5, help='A 方目标得分率')
+    parser.add_argument('--tolerance', type=float, default=0.02, help='偏差不超过该值视为达标')
+    parser.add_argument('-n', '--variants', type=int, default=27, help='逐级减半的初始变体数（含基线）')
+    parser.add_argument('--min-seeds', type=int, default=16, help='第一级每个变体每个对阵的种子数')
+    parser.add_argument('--eta', type=int, default=3, help='每级保留 1/eta')
+    parser.add_argument('--hyperband', action='store_true', help='以 Hyperband 运行多组逐级减半')
+    parser.add_argument('--max-seeds', type=int, default=None, help='Hyperband 最后一级的种子数，默认 min-seeds × eta²')
+    parser.add_argument('-c', '--chunk', type=int, default=16, help='每个任务的种子数')
+    parser.add_argument('-p', '--processes', type=int, default=0, help='工作进程数，0 表示 CPU 数')
+    parser.add_argument('-s', '--seed', type=int, default=None, help='起始种子，默认随机')
+    parser.add_argument('--no-streams', action='store_true', help='只在每局开始时设种，不对每个决策点单独设种')
+    parser.add_argument('--top', type=int, default=5, help='打印前若干变体')
+    parser.add_argument('-o', '--output', default=None, help='按偏差排列的结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    seed = random.randint(0, 100000) if args.seed is None else args.seed
+    rng = random.Random(seed)
+    try:
+        parameters = [Parameter(spec) for spec in args.param]
+    except ValueError as e:
+        parser.error(str(e))
+
+    gp = tournament.prepare(args.config)
+    if args.matchup is None:
+        matchups = [tuple(tuple(player['characters']) for player in gp.loader.players)]
+    else:
+        matchups = [(tuple(a.split('+')), tuple(b.split('+'))) for a, b in args.matchup]
+
+    # 父进程先验证参数地址，避免在工作进程中才报错
+    lowest: dict[str, dict[str, Any]] = {}
+    for parameter in parameters:
+        lowest.setdefault(parameter.stem, {})[parameter.key] = parameter.low
+    try:
+        gp.loader.use_overrides(lowest)
+    except KeyError as e:
+        parser.error(f'unknown parameter {e}')
+    gp.loader.use_overrides({})
+
+    sampled: list[Variant] = []
+
+    def sample(count: int) -> list[Variant]:
+        variants = [Variant(overrides, len(matchups)) for overrides in sample_variants(parameters, count, rng)]
+        sampled.extend(variants)
+        return variants
+
+    with WorkerPool(args.processes, configs=()) as pool:
+        search = Search(pool, matchups, seed, args.target, args.chunk, streams=not args.no_streams)
+        if args.hyperband:
+            max_seeds = args.max_seeds or args.min_seeds * args.eta ** 2
+            search.hyperband(sample, args.min_seeds, max_seeds, args.eta)
+        else:
+            sampled.insert(0, Variant({}, len(matchups)))
+            variants = sampled + sample(args.variants - 1)
+            rungs = max(1, int(math.log(len(variants), args.eta) + 1e-9) + 1)
+            search.successive_halving(variants, args.min_seeds, args.eta, rungs)
+        elapsed = time.perf_counter() - search.start
+
+    # 评估越充分的排在前面，同级按偏差排列
+    ranked = sorted(sampled, key=lambda variant: (-variant.seeds, variant.loss(args.target)))
+    # 全部变体都以最后一级种子数评估所需的对局数，每个种子在各对阵中双方各先手一局
+    uniform = len(sampled) * ranked[0].seeds * 2 * len(matchups)
+    print(f'\n时间 {elapsed:.2f}  种子: {seed}  对局: {search.games}  均匀分配同等精度需 {uniform} 局')
+    names = ['+'.join(a) + ' vs ' + '+'.join(b) for a, b in matchups]
+    for rank, variant in enumerate(ranked[:args.top], 1):
+        loss = variant.loss(args.target)
+        state = '达标' if loss <= args.tolerance else '未达标'
+        print(f'\n#{rank} 偏差 {loss:.4f} {state}  种子 {variant.seeds}  {variant.describe()}')
+        for name, rate, (low, high) in zip(names, variant.rates(), variant.intervals()):
+            print(f'    {name}: {rate:.4f}  得分率区间 [{low:.4f}, {high:.4f}]')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    'seed': seed,
+                    'target': args.target,
+                    'matchups': names,
+                    'variants': [
+                        {
+                            'overrides': variant.overrides,
+                            'seeds': variant.seeds,
+                            'loss': variant.loss(args.target),
+                            'rates': variant.rates().tolist(),
+                        }
+                        for variant in ranked
+                    ],
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f'\n已保存 {args.output}')
+
+
+if __name__ == '__main__':
+    main()